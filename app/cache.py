@@ -0,0 +1,69 @@
+from collections import OrderedDict
+from datetime import date
+from threading import Lock
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Quantidade máxima de dias (médico, dia) mantidos em memória
+AGENDA_CACHE_MAX_ENTRADAS = 2048
+
+class AgendaCache:
+    """Cache LRU da agenda diária, indexado por (médico, dia)"""
+
+    def __init__(self, max_entradas: int = AGENDA_CACHE_MAX_ENTRADAS):
+        self.max_entradas = max_entradas
+        self._dados: "OrderedDict[Tuple[str, date], tuple]" = OrderedDict()
+        self._lock = Lock()
+        # Incrementado a cada invalidação; evita gravar leituras concorrentes já obsoletas
+        self._versao = 0
+
+    def obter(self, medico: str, dia: date) -> Optional[tuple]:
+        """Retorna as consultas em cache do dia ou None se ausente"""
+        chave = (medico, dia)
+        with self._lock:
+            consultas = self._dados.get(chave)
+            if consultas is not None:
+                self._dados.move_to_end(chave)
+            return consultas
+
+    def obter_varios(self, medico: str, dias: Iterable[date]) -> Tuple[Dict[date, tuple], List[date]]:
+        """Separa os dias em encontrados no cache e ausentes"""
+        encontrados = {}
+        ausentes = []
+        for dia in dias:
+            consultas = self.obter(medico, dia)
+            if consultas is None:
+                ausentes.append(dia)
+            else:
+                encontrados[dia] = consultas
+        return encontrados, ausentes
+
+    def versao(self) -> int:
+        """Versão atual do cache, lida antes de consultar o banco"""
+        with self._lock:
+            return self._versao
+
+    def guardar(self, medico: str, dia: date, consultas: Iterable, versao: Optional[int] = None) -> None:
+        """Armazena as consultas do dia, descartando a entrada menos usada"""
+        chave = (medico, dia)
+        with self._lock:
+            if versao is not None and versao != self._versao:
+                return
+            self._dados[chave] = tuple(consultas)
+            self._dados.move_to_end(chave)
+            while len(self._dados) > self.max_entradas:
+                self._dados.popitem(last=False)
+
+    def invalidar(self, medico: str, dia: date) -> None:
+        """Remove um único dia da agenda de um médico"""
+        with self._lock:
+            self._versao += 1
+            self._dados.pop((medico, dia), None)
+
+    def limpar(self) -> None:
+        """Esvazia o cache inteiro"""
+        with self._lock:
+            self._versao += 1
+            self._dados.clear()
+
+# Instância compartilhada pelas rotas de consultas
+agenda_cache = AgendaCache()
@@ -0,0 +1,41 @@
+from fastapi import HTTPException, status
+from pydantic import BaseModel
+from sqlalchemy.orm import load_only
+from typing import Iterable, List, Optional, Type
+
+def resolver_campos(
+    fields: Optional[str],
+    schema: Type[BaseModel],
+    padrao: Optional[Iterable[str]] = None
+) -> List[str]:
+    """Valida o parâmetro ?fields= contra o schema; sem ele usa o padrão (ou todos os campos)"""
+    disponiveis = list(schema.model_fields)
+    if not fields:
+        return list(padrao) if padrao is not None else disponiveis
+
+    campos = []
+    for campo in fields.split(","):
+        campo = campo.strip()
+        if campo and campo not in campos:
+            campos.append(campo)
+
+    invalidos = [campo for campo in campos if campo not in disponiveis]
+    if invalidos:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Campos inválidos: {', '.join(invalidos)}"
+        )
+
+    # O id sempre acompanha a resposta
+    if "id" not in campos:
+        campos.insert(0, "id")
+    return campos
+
+def carregar_apenas(modelo, campos: Iterable[str]):
+    """Opção de consulta que carrega só as colunas pedidas (inclui as deferred)"""
+    colunas = modelo.__table__.columns
+    return load_only(*[getattr(modelo, campo) for campo in campos if campo in colunas])
+
+def projetar(obj, campos: Iterable[str]) -> dict:
+    """Monta a resposta apenas com os campos pedidos"""
+    return {campo: getattr(obj, campo) for campo in campos}
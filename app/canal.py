@@ -0,0 +1,79 @@
+import json
+import logging
+import socket
+from datetime import date, datetime
+from threading import Lock, Thread
+from typing import Callable, Dict, Optional
+from app.cache import agenda_cache
+from app.mudancas import broker_mudancas
+from app.lembretes import agendador_lembretes
+
+logger = logging.getLogger(__name__)
+
+class CanalProcessos:
+    """Repasse de invalidações entre os workers do modo prefork.
+
+    Cada worker fica ligado ao processo principal por um par de sockets Unix;
+    o que um worker envia o principal repassa aos demais, que aplicam a
+    mensagem apenas localmente. Em modo de processo único nada é enviado.
+    """
+
+    def __init__(self):
+        self._handlers: Dict[str, Callable[[dict], None]] = {}
+        self._sock: Optional[socket.socket] = None
+        self._lock = Lock()
+
+    def registrar(self, tipo: str, funcao: Callable[[dict], None]) -> None:
+        self._handlers[tipo] = funcao
+
+    def emitir(self, tipo: str, **dados) -> None:
+        """Aplica a mensagem neste processo e a repassa aos demais workers"""
+        self._handlers[tipo](dados)
+        if self._sock is None:
+            return
+        linha = (json.dumps({"tipo": tipo, "dados": dados}) + "\n").encode()
+        try:
+            with self._lock:
+                self._sock.sendall(linha)
+        except OSError:
+            logger.exception("Falha ao repassar mensagem '%s' aos outros workers", tipo)
+
+    def conectar(self, sock: socket.socket) -> None:
+        """Liga o worker ao processo principal e passa a receber as mensagens dos outros"""
+        self._sock = sock
+        Thread(target=self._receber, name="canal-processos", daemon=True).start()
+
+    def _receber(self) -> None:
+        for linha in self._sock.makefile("rb"):
+            try:
+                mensagem = json.loads(linha)
+                self._handlers[mensagem["tipo"]](mensagem["dados"])
+            except Exception:
+                logger.exception("Mensagem inválida no canal entre processos")
+
+canal = CanalProcessos()
+
+canal.registrar("agenda", lambda dados: agenda_cache.invalidar(
+    dados["medico"], date.fromisoformat(dados["dia"])
+))
+canal.registrar("mudanca", lambda dados: broker_mudancas.publicar(dados["evento"]))
+canal.registrar("lembrete", lambda dados: agendador_lembretes.consulta_alterada(
+    dados["consulta_id"], datetime.fromisoformat(dados["data_hora"]), dados["status"]
+))
+canal.registrar("lembrete_removido", lambda dados: agendador_lembretes.consulta_removida(
+    dados["consulta_id"]
+))
+
+# Funções usadas pelas rotas: aplicam localmente e avisam os outros workers
+
+def invalidar_agenda(medico: str, dia: date) -> None:
+    canal.emitir("agenda", medico=medico, dia=dia.isoformat())
+
+def publicar_mudanca(evento: dict) -> None:
+    canal.emitir("mudanca", evento=evento)
+
+def lembrete_consulta_alterada(consulta_id: int, data_hora: datetime, status: str) -> None:
+    canal.emitir("lembrete", consulta_id=consulta_id, data_hora=data_hora.isoformat(), status=status)
+
+def lembrete_consulta_removida(consulta_id: int) -> None:
+    canal.emitir("lembrete_removido", consulta_id=consulta_id)
@@ -1,4 +1,4 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 
@@ -11,6 +11,11 @@ engine = create_engine(
     connect_args={"check_same_thread": False}
 )
 
+# WAL: leituras (backup, verificações do ver_db.py) não bloqueiam as escritas da API
+@event.listens_for(engine, "connect")
+def configurar_sqlite(conexao, _):
+    conexao.execute("PRAGMA journal_mode=WAL")
+
 # Criar sessão
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
@@ -0,0 +1,366 @@
+import heapq
+import logging
+from datetime import datetime, timedelta
+from threading import Condition, Event, Thread
+from typing import Callable, Dict, List, Optional, Tuple
+from sqlalchemy import delete, or_, select, update
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from app.database import SessionLocal
+from app.models import Consulta, LembreteOutbox
+
+logger = logging.getLogger(__name__)
+
+# Antecedências dos lembretes, da maior para a menor
+ANTECEDENCIAS = [("24h", timedelta(hours=24)), ("2h", timedelta(hours=2))]
+
+# Janela de consultas mantida em memória; recarregada em passos pela consulta indexada
+HORIZONTE = timedelta(days=2)
+PASSO_JANELA = timedelta(hours=1)
+
+# Lembretes gravados por transação no outbox
+LOTE_OUTBOX = 1000
+
+# Espera após um erro no agendador, dobrando a cada erro seguido (segundos)
+ESPERA_ERRO_MIN = 1
+ESPERA_ERRO_MAX = 60
+
+# Intervalo de verificação do trabalhador do outbox (segundos)
+INTERVALO_OUTBOX = 5
+
+# Reenvio com espera dobrando a cada falha (1, 2, 4... min; cerca de 2h no total)
+MAX_TENTATIVAS = 8
+ATRASO_TENTATIVA = timedelta(minutes=1)
+
+class AgendadorLembretes:
+    """Heap de lembretes ordenada pelo horário de envio.
+
+    As consultas agendadas da janela [agora, agora + HORIZONTE] são carregadas
+    pelo índice (status, data_hora); as rotas avisam criações, reagendamentos e
+    cancelamentos. Entradas obsoletas da heap são descartadas ao sair dela.
+    """
+
+    def __init__(self, fabrica_sessao=SessionLocal, agora: Callable[[], datetime] = datetime.now):
+        self.fabrica_sessao = fabrica_sessao
+        self.agora = agora
+        self._heap: List[Tuple[datetime, int, str, datetime]] = []
+        self._consultas: Dict[int, datetime] = {}  # consulta_id -> data_hora agendada
+        self._carregado_ate: Optional[datetime] = None
+        self._tocadas_na_carga: Optional[set] = None  # ids alterados durante carregar_janela
+        self._condicao = Condition()
+        self._parar = Event()
+        self._thread: Optional[Thread] = None
+
+    # Atualizações vindas das rotas
+
+    def consulta_alterada(self, consulta_id: int, data_hora: datetime, status: str) -> None:
+        """Agenda, reagenda ou remove os lembretes de uma consulta"""
+        with self._condicao:
+            if self._carregado_ate is None:
+                return
+            if self._tocadas_na_carga is not None:
+                self._tocadas_na_carga.add(consulta_id)
+            if status != "agendada" or data_hora > self._carregado_ate:
+                # Fora da janela: será carregada quando a janela avançar
+                self._consultas.pop(consulta_id, None)
+                return
+            if self._consultas.get(consulta_id) == data_hora:
+                return
+            self._consultas[consulta_id] = data_hora
+            antes = self._heap[0][0] if self._heap else None
+            for tipo, antecedencia in ANTECEDENCIAS:
+                heapq.heappush(self._heap, (data_hora - antecedencia, consulta_id, tipo, data_hora))
+            if antes is None or self._heap[0][0] < antes:
+                self._condicao.notify()
+
+    def consulta_removida(self, consulta_id: int) -> None:
+        with self._condicao:
+            if self._tocadas_na_carga is not None:
+                self._tocadas_na_carga.add(consulta_id)
+            self._consultas.pop(consulta_id, None)
+
+    # Carga da janela
+
+    def carregar_janela(self) -> int:
+        """Carrega as consultas agendadas que entraram na janela; retorna quantas"""
+        agora = self.agora()
+        limite = agora + HORIZONTE
+        with self._condicao:
+            inicio = self._carregado_ate if self._carregado_ate is not None else agora
+            if limite <= inicio:
+                return 0
+            # A janela avança antes da leitura para que as rotas já tratem as novas consultas;
+            # o que elas alterarem durante a leitura prevalece sobre o resultado lido
+            self._carregado_ate = limite
+            self._tocadas_na_carga = set()
+
+        db = self.fabrica_sessao()
+        try:
+            linhas = db.execute(
+                select(Consulta.id, Consulta.data_hora)
+                .where(
+                    Consulta.status == "agendada",
+                    Consulta.data_hora > inicio,
+                    Consulta.data_hora <= limite
+                )
+            ).all()
+        except Exception:
+            with self._condicao:
+                self._carregado_ate = inicio
+                self._tocadas_na_carga = None
+            raise
+        finally:
+            db.close()
+
+        with self._condicao:
+            linhas = [linha for linha in linhas if linha[0] not in self._tocadas_na_carga]
+            self._tocadas_na_carga = None
+            novas = [
+                (data_hora - antecedencia, consulta_id, tipo, data_hora)
+                for consulta_id, data_hora in linhas
+                for tipo, antecedencia in ANTECEDENCIAS
+            ]
+            for consulta_id, data_hora in linhas:
+                self._consultas[consulta_id] = data_hora
+            if len(novas) > len(self._heap):
+                self._heap.extend(novas)
+                heapq.heapify(self._heap)
+            else:
+                for entrada in novas:
+                    heapq.heappush(self._heap, entrada)
+            self._compactar()
+            self._condicao.notify()
+        return len(linhas)
+
+    def _compactar(self) -> None:
+        """Reconstrói a heap quando a maior parte das entradas ficou obsoleta"""
+        if len(self._heap) > 4 * len(ANTECEDENCIAS) * max(len(self._consultas), 1024):
+            self._heap = [entrada for entrada in self._heap if self._valida(entrada)]
+            heapq.heapify(self._heap)
+
+    def _valida(self, entrada) -> bool:
+        _, consulta_id, _, data_hora = entrada
+        return self._consultas.get(consulta_id) == data_hora
+
+    # Envio para o outbox
+
+    def _retirar_vencidos(self, agora: datetime, limite: int) -> List[dict]:
+        vencidos = []
+        while self._heap and self._heap[0][0] <= agora and len(vencidos) < limite:
+            entrada = heapq.heappop(self._heap)
+            devido_em, consulta_id, tipo, data_hora = entrada
+            if not self._valida(entrada):
+                continue
+            if data_hora <= agora:
+                # Consulta já passou (ex.: criada com data no passado): deixa de ser acompanhada
+                self._consultas.pop(consulta_id, None)
+                continue
+            # Se um lembrete mais próximo da consulta também venceu (ex.: API parada), envia só ele
+            if any(
+                data_hora - antecedencia <= agora
+                for _, antecedencia in ANTECEDENCIAS
+                if antecedencia < data_hora - devido_em
+            ):
+                continue
+            vencidos.append({
+                "consulta_id": consulta_id,
+                "tipo": tipo,
+                "data_hora_consulta": data_hora,
+                "devido_em": devido_em
+            })
+        # Consultas cujos lembretes já saíram todos da heap deixam de ser acompanhadas
+        for lembrete in vencidos:
+            if lembrete["tipo"] == ANTECEDENCIAS[-1][0]:
+                self._consultas.pop(lembrete["consulta_id"], None)
+        return vencidos
+
+    def processar_vencidos(self, limite: int = LOTE_OUTBOX) -> int:
+        """Grava no outbox, em uma transação, até `limite` lembretes vencidos; retorna quantos entraram"""
+        with self._condicao:
+            vencidos = self._retirar_vencidos(self.agora(), limite)
+        if not vencidos:
+            return 0
+
+        db = self.fabrica_sessao()
+        try:
+            # Só as linhas inseridas voltam; as que já estavam no outbox são ignoradas
+            gravados = len(db.execute(
+                sqlite_insert(LembreteOutbox).on_conflict_do_nothing().returning(LembreteOutbox.id),
+                vencidos
+            ).all())
+            db.commit()
+        except Exception:
+            db.rollback()
+            # Devolve à heap para tentar no próximo ciclo
+            with self._condicao:
+                for lembrete in vencidos:
+                    self._consultas.setdefault(lembrete["consulta_id"], lembrete["data_hora_consulta"])
+                    heapq.heappush(self._heap, (
+                        lembrete["devido_em"], lembrete["consulta_id"],
+                        lembrete["tipo"], lembrete["data_hora_consulta"]
+                    ))
+            raise
+        finally:
+            db.close()
+        return gravados
+
+    # Thread em segundo plano
+
+    def _executar(self) -> None:
+        espera_erro = 0
+        while not self._parar.is_set():
+            try:
+                if self.agora() + HORIZONTE - self._carregado_ate >= PASSO_JANELA:
+                    self.carregar_janela()
+                while self.processar_vencidos() == LOTE_OUTBOX:
+                    pass
+                espera_erro = 0
+            except Exception:
+                logger.exception("Erro no agendador de lembretes")
+                # O lote que falhou volta à heap já vencido; sem espera o laço repetiria sem parar
+                espera_erro = min(max(espera_erro * 2, ESPERA_ERRO_MIN), ESPERA_ERRO_MAX)
+
+            with self._condicao:
+                espera = PASSO_JANELA.total_seconds()
+                if self._heap:
+                    espera = min(espera, (self._heap[0][0] - self.agora()).total_seconds())
+                espera = max(espera, espera_erro)
+                if espera > 0 and not self._parar.is_set():
+                    self._condicao.wait(espera)
+
+    def iniciar(self) -> None:
+        self._parar.clear()
+        self.carregar_janela()
+        self._thread = Thread(target=self._executar, name="agendador-lembretes", daemon=True)
+        self._thread.start()
+
+    def parar(self) -> None:
+        self._parar.set()
+        with self._condicao:
+            self._condicao.notify()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+
+def enviar_lembrete(lembrete: LembreteOutbox) -> None:
+    """Envio padrão: apenas registra (integração com SMS/e-mail fica a cargo da clínica)"""
+    logger.info(
+        "Lembrete %s da consulta %s (%s)",
+        lembrete.tipo, lembrete.consulta_id, lembrete.data_hora_consulta
+    )
+
+class TrabalhadorOutbox:
+    """Esvazia o outbox de lembretes, marcando cada um como enviado.
+
+    Lembretes cuja consulta foi cancelada, removida, reagendada ou já passou
+    são apagados do outbox em vez de enviados.
+    """
+
+    def __init__(
+        self,
+        enviar: Callable[[LembreteOutbox], None] = enviar_lembrete,
+        fabrica_sessao=SessionLocal,
+        intervalo: float = INTERVALO_OUTBOX,
+        lote: int = 100,
+        agora: Callable[[], datetime] = datetime.now
+    ):
+        self.enviar = enviar
+        self.fabrica_sessao = fabrica_sessao
+        self.agora = agora
+        self.intervalo = intervalo
+        self.lote = lote
+        self._parar = Event()
+        self._thread: Optional[Thread] = None
+
+    def drenar(self) -> int:
+        """Processa um lote de lembretes pendentes; retorna quantos foram enviados"""
+        agora = self.agora()
+        db = self.fabrica_sessao()
+        try:
+            linhas = db.execute(
+                select(LembreteOutbox, Consulta.status, Consulta.data_hora)
+                .outerjoin(Consulta, Consulta.id == LembreteOutbox.consulta_id)
+                .where(
+                    LembreteOutbox.enviado_em.is_(None),
+                    LembreteOutbox.tentativas < MAX_TENTATIVAS,
+                    or_(
+                        LembreteOutbox.proxima_tentativa.is_(None),
+                        LembreteOutbox.proxima_tentativa <= agora
+                    )
+                )
+                .order_by(LembreteOutbox.id)
+                .limit(self.lote)
+            ).all()
+            enviados, obsoletos, esgotados = [], [], []
+            falhas: Dict[int, List[int]] = {}  # tentativas após a falha -> ids
+            for lembrete, status_consulta, data_hora in linhas:
+                if (
+                    status_consulta != "agendada"
+                    or data_hora != lembrete.data_hora_consulta
+                    or data_hora <= agora
+                ):
+                    obsoletos.append(lembrete.id)
+                    continue
+                try:
+                    self.enviar(lembrete)
+                    enviados.append(lembrete.id)
+                except Exception:
+                    logger.exception("Falha ao enviar lembrete %s", lembrete.id)
+                    falhas.setdefault(lembrete.tentativas + 1, []).append(lembrete.id)
+                    if lembrete.tentativas + 1 >= MAX_TENTATIVAS:
+                        esgotados.append(lembrete.id)
+            if obsoletos:
+                # Apagados, não marcados: reagendar de volta ao mesmo horário gera o lembrete de novo
+                db.execute(delete(LembreteOutbox).where(LembreteOutbox.id.in_(obsoletos)))
+            if enviados:
+                db.execute(
+                    update(LembreteOutbox)
+                    .where(LembreteOutbox.id.in_(enviados))
+                    .values(enviado_em=datetime.utcnow())
+                )
+            for tentativas, ids in falhas.items():
+                db.execute(
+                    update(LembreteOutbox)
+                    .where(LembreteOutbox.id.in_(ids))
+                    .values(
+                        tentativas=tentativas,
+                        proxima_tentativa=agora + ATRASO_TENTATIVA * 2 ** (tentativas - 1)
+                    )
+                )
+            db.commit()
+            if obsoletos:
+                logger.info(
+                    "%s lembretes descartados: consulta cancelada, removida, reagendada ou já passada",
+                    len(obsoletos)
+                )
+            if esgotados:
+                # Ficam no outbox com enviado_em nulo e tentativas = MAX_TENTATIVAS
+                logger.error(
+                    "Lembretes abandonados após %s tentativas: %s", MAX_TENTATIVAS, esgotados
+                )
+            return len(enviados)
+        finally:
+            db.close()
+
+    def _executar(self) -> None:
+        while not self._parar.is_set():
+            try:
+                while self.drenar() == self.lote and not self._parar.is_set():
+                    pass
+            except Exception:
+                logger.exception("Erro no trabalhador do outbox")
+            self._parar.wait(self.intervalo)
+
+    def iniciar(self) -> None:
+        self._parar.clear()
+        self._thread = Thread(target=self._executar, name="outbox-lembretes", daemon=True)
+        self._thread.start()
+
+    def parar(self) -> None:
+        self._parar.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+
+# Instâncias usadas pela aplicação (iniciadas no lifespan)
+agendador_lembretes = AgendadorLembretes()
+trabalhador_outbox = TrabalhadorOutbox()
@@ -1,18 +1,36 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, Depends
 from fastapi.middleware.cors import CORSMiddleware
 from sqlalchemy.orm import Session
 from app.database import engine, get_db, Base
+from app.migracoes import aplicar_migracoes
 from app.routes import auth_routes, pacientes, consultas
 from app.models import Usuario, LogAcesso
+from app.lembretes import agendador_lembretes, trabalhador_outbox
 
 # Criar tabelas no banco de dados
 Base.metadata.create_all(bind=engine)
+aplicar_migracoes(engine)
+
+# Tarefas em segundo plano (lembretes de consultas)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # No modo prefork apenas um dos workers executa as tarefas (ver app/servidor.py)
+    tarefas = getattr(app.state, "tarefas_segundo_plano", True)
+    if tarefas:
+        agendador_lembretes.iniciar()
+        trabalhador_outbox.iniciar()
+    yield
+    if tarefas:
+        trabalhador_outbox.parar()
+        agendador_lembretes.parar()
 
 # Criar aplicação FastAPI
 app = FastAPI(
     title="HealthAPI - Sistema de Gestão de Clínica",
     description="API REST para gerenciamento de pacientes e consultas médicas",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # Configurar CORS (permite requisições de qualquer origem)
@@ -65,5 +83,6 @@ def listar_logs(db: Session = Depends(get_db)):
     }
 
 if __name__ == "__main__":
-    import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
+    # Um processo por padrão; use --workers N (ou HEALTHAPI_WORKERS) para o modo prefork
+    from app.servidor import main
+    main(app)
\ No newline at end of file
@@ -0,0 +1,105 @@
+import logging
+from sqlalchemy import MetaData, inspect, text
+from sqlalchemy.schema import CreateTable
+from app.models import Paciente, Usuario
+from app.schemas import normalizar_data_nascimento
+
+logger = logging.getLogger(__name__)
+
+def aplicar_migracoes(engine):
+    """Atualiza bancos criados por versões anteriores (create_all não altera tabelas existentes)"""
+    with engine.begin() as conn:
+        # O pysqlite não abre transação antes de DDL; sem isso uma falha deixaria o esquema pela metade
+        conn.exec_driver_sql("BEGIN")
+        colunas = {coluna["name"] for coluna in inspect(conn).get_columns("consultas")}
+        
+        # Sequência de mudanças das consultas
+        if "seq" not in colunas:
+            conn.execute(text("ALTER TABLE consultas ADD COLUMN seq INTEGER"))
+        conn.execute(text("CREATE INDEX IF NOT EXISTS ix_consultas_seq ON consultas (seq)"))
+        conn.execute(text("UPDATE consultas SET seq = id WHERE seq IS NULL"))
+        conn.execute(text("INSERT OR IGNORE INTO sequencias (nome, valor) VALUES ('consultas', 0)"))
+        conn.execute(text(
+            "UPDATE sequencias SET valor = MAX(valor, "
+            "(SELECT COALESCE(MAX(seq), 0) FROM consultas), "
+            "(SELECT COALESCE(MAX(seq), 0) FROM consultas_removidas)) "
+            "WHERE nome = 'consultas'"
+        ))
+        
+        # Índice da agenda por médico
+        conn.execute(text(
+            "CREATE INDEX IF NOT EXISTS ix_consultas_medico_data_hora "
+            "ON consultas (medico_nome, data_hora)"
+        ))
+        
+        # Índice do agendador de lembretes
+        conn.execute(text(
+            "CREATE INDEX IF NOT EXISTS ix_consultas_status_data_hora "
+            "ON consultas (status, data_hora)"
+        ))
+        
+        # Espera entre tentativas no outbox de lembretes
+        colunas_outbox = {coluna["name"] for coluna in inspect(conn).get_columns("lembretes_outbox")}
+        if "proxima_tentativa" not in colunas_outbox:
+            conn.execute(text("ALTER TABLE lembretes_outbox ADD COLUMN proxima_tentativa DATETIME"))
+        
+        # Data de nascimento: texto livre -> DATE indexado
+        tipos = {coluna["name"]: str(coluna["type"]).upper() for coluna in inspect(conn).get_columns("pacientes")}
+        if tipos.get("data_nascimento") != "DATE":
+            _normalizar_datas_nascimento(conn)
+            _recriar_tabela_pacientes(conn)
+
+def _normalizar_datas_nascimento(conn):
+    """Reescreve as datas de nascimento em AAAA-MM-DD.
+
+    Valores inválidos ou no futuro são copiados para pacientes_data_nascimento_legado
+    antes de virarem NULL, para correção manual.
+    """
+    invalidos = []
+    linhas = conn.execute(text(
+        "SELECT id, data_nascimento FROM pacientes WHERE data_nascimento IS NOT NULL"
+    )).all()
+    for paciente_id, valor in linhas:
+        try:
+            data = normalizar_data_nascimento(valor)
+        except ValueError:
+            data = None
+            invalidos.append({"paciente_id": paciente_id, "valor": valor})
+        novo = data.isoformat() if data else None
+        if novo != valor:
+            conn.execute(
+                text("UPDATE pacientes SET data_nascimento = :data WHERE id = :id"),
+                {"data": novo, "id": paciente_id}
+            )
+    if invalidos:
+        conn.execute(text(
+            "CREATE TABLE IF NOT EXISTS pacientes_data_nascimento_legado "
+            "(paciente_id INTEGER PRIMARY KEY, valor TEXT NOT NULL)"
+        ))
+        conn.execute(
+            text(
+                "INSERT OR REPLACE INTO pacientes_data_nascimento_legado (paciente_id, valor) "
+                "VALUES (:paciente_id, :valor)"
+            ),
+            invalidos
+        )
+        logger.warning(
+            "%s datas de nascimento inválidas guardadas em pacientes_data_nascimento_legado: %s",
+            len(invalidos), [linha["paciente_id"] for linha in invalidos]
+        )
+
+def _recriar_tabela_pacientes(conn):
+    """Recria a tabela pacientes com o esquema atual (SQLite não altera tipo de coluna)"""
+    tabela = Paciente.__table__
+    metadata = MetaData()
+    Usuario.__table__.to_metadata(metadata)  # alvo da chave estrangeira
+    nova = tabela.to_metadata(metadata, name="pacientes_nova")
+    colunas = ", ".join(coluna.name for coluna in tabela.columns)
+    
+    # A tabela nova é criada sem índices para não colidir com os nomes da antiga
+    conn.execute(CreateTable(nova))
+    conn.execute(text(f"INSERT INTO pacientes_nova ({colunas}) SELECT {colunas} FROM pacientes"))
+    conn.execute(text("DROP TABLE pacientes"))
+    conn.execute(text("ALTER TABLE pacientes_nova RENAME TO pacientes"))
+    for indice in tabela.indexes:
+        indice.create(conn)
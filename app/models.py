@@ -1,5 +1,5 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, Date, DateTime, ForeignKey, Text, Index, UniqueConstraint
+from sqlalchemy.orm import relationship, deferred
 from datetime import datetime
 from app.database import Base
 
@@ -24,9 +24,10 @@ class Paciente(Base):
     usuario_id = Column(Integer, ForeignKey("usuarios.id"), unique=True)
     cpf = Column(String(11), unique=True, index=True, nullable=False)
     telefone = Column(String(15))
-    data_nascimento = Column(String(10))
-    endereco = Column(String(255))
-    historico_medico = Column(Text)
+    data_nascimento = Column(Date, index=True)
+    # Colunas grandes só são carregadas quando pedidas (?fields=)
+    endereco = deferred(Column(String(255)))
+    historico_medico = deferred(Column(Text))
     criado_em = Column(DateTime, default=datetime.utcnow)
     atualizado_em = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
@@ -43,12 +44,51 @@ class Consulta(Base):
     data_hora = Column(DateTime, nullable=False)
     tipo = Column(String(20), default="presencial")  # presencial, online
     status = Column(String(20), default="agendada")  # agendada, realizada, cancelada
-    observacoes = Column(Text)
+    observacoes = deferred(Column(Text))  # carregada só quando pedida (?fields=)
     criado_em = Column(DateTime, default=datetime.utcnow)
+    seq = Column(Integer, index=True)  # sequência da última alteração (feed de mudanças)
     
     # Relacionamentos
     paciente = relationship("Paciente", back_populates="consultas")
 
+    # Índice para consultas por intervalo na agenda do médico
+    __table_args__ = (
+        Index("ix_consultas_medico_data_hora", "medico_nome", "data_hora"),
+        Index("ix_consultas_status_data_hora", "status", "data_hora"),  # agendador de lembretes
+    )
+
+class ConsultaRemovida(Base):
+    __tablename__ = "consultas_removidas"
+    
+    seq = Column(Integer, primary_key=True)
+    consulta_id = Column(Integer, nullable=False)
+    removida_em = Column(DateTime, default=datetime.utcnow)
+
+class Sequencia(Base):
+    __tablename__ = "sequencias"
+    
+    nome = Column(String(50), primary_key=True)
+    valor = Column(Integer, nullable=False, default=0)
+
+class LembreteOutbox(Base):
+    __tablename__ = "lembretes_outbox"
+    
+    id = Column(Integer, primary_key=True)
+    consulta_id = Column(Integer, nullable=False)
+    tipo = Column(String(10), nullable=False)  # 24h, 2h
+    data_hora_consulta = Column(DateTime, nullable=False)
+    devido_em = Column(DateTime, nullable=False)
+    criado_em = Column(DateTime, default=datetime.utcnow)
+    enviado_em = Column(DateTime)
+    tentativas = Column(Integer, nullable=False, default=0)
+    proxima_tentativa = Column(DateTime)  # após uma falha de envio
+    
+    __table_args__ = (
+        # Um lembrete por consulta, tipo e horário (reagendar gera novos lembretes)
+        UniqueConstraint("consulta_id", "tipo", "data_hora_consulta"),
+        Index("ix_lembretes_outbox_pendentes", "enviado_em", "id"),
+    )
+
 class LogAcesso(Base):
     __tablename__ = "logs_acesso"
     
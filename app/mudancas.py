@@ -0,0 +1,71 @@
+import asyncio
+from threading import Lock
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+from app.models import Sequencia
+
+# Eventos pendentes por cliente SSE antes de desconectá-lo
+BROKER_TAMANHO_FILA = 1000
+
+def proxima_seq(db: Session, quantidade: int = 1) -> int:
+    """Reserva `quantidade` valores da sequência de consultas e retorna o último.
+
+    Deve ser chamada dentro da transação de escrita: o SQLite serializa os
+    escritores, então a ordem das sequências segue a ordem dos commits.
+    """
+    valor = db.execute(
+        update(Sequencia)
+        .where(Sequencia.nome == "consultas")
+        .values(valor=Sequencia.valor + quantidade)
+        .returning(Sequencia.valor)
+        .execution_options(synchronize_session=False)
+    ).scalar()
+    if valor is None:
+        db.add(Sequencia(nome="consultas", valor=quantidade))
+        db.flush()
+        valor = quantidade
+    return valor
+
+class BrokerMudancas:
+    """Distribui mudanças já confirmadas para os clientes SSE deste processo"""
+
+    def __init__(self, tamanho_fila: int = BROKER_TAMANHO_FILA):
+        self.tamanho_fila = tamanho_fila
+        self._inscritos = {}
+        self._lock = Lock()
+
+    def inscrever(self) -> asyncio.Queue:
+        """Cria a fila de um cliente; deve ser chamada no event loop"""
+        fila = asyncio.Queue(maxsize=self.tamanho_fila)
+        with self._lock:
+            self._inscritos[fila] = asyncio.get_running_loop()
+        return fila
+
+    def cancelar(self, fila: asyncio.Queue) -> None:
+        """Remove a fila de um cliente desconectado"""
+        with self._lock:
+            self._inscritos.pop(fila, None)
+
+    def publicar(self, evento: dict) -> None:
+        """Envia o evento a todos os inscritos; pode ser chamada de qualquer thread"""
+        with self._lock:
+            inscritos = list(self._inscritos.items())
+        for fila, loop in inscritos:
+            try:
+                loop.call_soon_threadsafe(self._entregar, fila, evento)
+            except RuntimeError:
+                # Event loop já encerrado
+                self.cancelar(fila)
+
+    def _entregar(self, fila: asyncio.Queue, evento: dict) -> None:
+        try:
+            fila.put_nowait(evento)
+        except asyncio.QueueFull:
+            # Cliente lento: encerra o stream; ele reconecta com Last-Event-ID
+            self.cancelar(fila)
+            while not fila.empty():
+                fila.get_nowait()
+            fila.put_nowait(None)
+
+# Instância compartilhada pelas rotas de consultas
+broker_mudancas = BrokerMudancas()
@@ -1,13 +1,131 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
-from app.database import get_db
-from app.models import Consulta, Paciente, Usuario, LogAcesso
-from app.schemas import ConsultaCreate, ConsultaUpdate, ConsultaResponse
+from fastapi import APIRouter, Depends, HTTPException, Header, Request, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from sqlalchemy import case, insert, select, update
+from sqlalchemy.orm import Session, undefer
+from typing import List, Optional
+from datetime import date, datetime, time, timedelta
+import asyncio
+import json
+from app.database import get_db, SessionLocal
+from app.models import Consulta, ConsultaRemovida, Paciente, Usuario, LogAcesso
+from app.schemas import (
+    ConsultaCreate,
+    ConsultaUpdate,
+    ConsultaResponse,
+    ConsultaParcial,
+    ConsultaLoteCreate,
+    ConsultaLoteUpdate,
+    ConsultaLoteResultado,
+    ConsultaRemovidaResponse,
+    MudancasResponse,
+    AgendaResponse
+)
 from app.auth import obter_usuario_atual
+from app.cache import agenda_cache
+from app.mudancas import proxima_seq, broker_mudancas
+from app.campos import resolver_campos, carregar_apenas, projetar
+from app.canal import (
+    invalidar_agenda,
+    publicar_mudanca,
+    lembrete_consulta_alterada,
+    lembrete_consulta_removida
+)
 
 router = APIRouter(prefix="/consultas", tags=["Consultas"])
 
+# Intervalo máximo aceito pela agenda (em dias)
+AGENDA_MAX_DIAS = 92
+
+# Limite de consultas por operação em lote (após expandir recorrências)
+LOTE_MAX_CONSULTAS = 500
+
+STATUS_CONSULTA = ["agendada", "realizada", "cancelada"]
+INTERVALOS_RECORRENCIA = {"diaria": timedelta(days=1), "semanal": timedelta(weeks=1)}
+
+# Campos da listagem quando ?fields= não é informado (sem as observações)
+CONSULTA_CAMPOS_LISTA = [
+    "id", "paciente_id", "medico_nome", "data_hora", "tipo", "status", "criado_em", "seq"
+]
+
+# Limite de mudanças por página do feed
+MUDANCAS_LIMITE_PADRAO = 500
+MUDANCAS_LIMITE_MAX = 5000
+
+# Intervalo entre comentários de keep-alive no stream SSE (segundos)
+SSE_KEEPALIVE = 15
+
+def _invalidar_agenda(consulta: Consulta):
+    """Remove do cache o dia da agenda afetado pela consulta"""
+    invalidar_agenda(consulta.medico_nome, consulta.data_hora.date())
+
+def _evento_alterada(consulta: Consulta) -> dict:
+    """Evento do feed para uma consulta criada ou atualizada"""
+    return {
+        "tipo": "alterada",
+        "seq": consulta.seq,
+        "consulta": ConsultaResponse.model_validate(consulta).model_dump(mode="json")
+    }
+
+def _evento_removida(removida: ConsultaRemovida) -> dict:
+    """Evento do feed (tombstone) para uma consulta deletada"""
+    return {
+        "tipo": "removida",
+        "seq": removida.seq,
+        "consulta": ConsultaRemovidaResponse(
+            id=removida.consulta_id,
+            seq=removida.seq,
+            removida_em=removida.removida_em
+        ).model_dump(mode="json")
+    }
+
+def _buscar_mudancas(db: Session, desde: int, limite: int) -> dict:
+    """Mudanças com seq maior que `desde`, em ordem de seq"""
+    alteradas = db.query(Consulta).options(undefer(Consulta.observacoes)).filter(
+        Consulta.seq > desde
+    ).order_by(Consulta.seq).limit(limite + 1).all()
+    removidas = db.query(ConsultaRemovida).filter(
+        ConsultaRemovida.seq > desde
+    ).order_by(ConsultaRemovida.seq).limit(limite + 1).all()
+    
+    # Intercala as duas listas e corta no limite
+    eventos = sorted(
+        [(consulta.seq, consulta) for consulta in alteradas] +
+        [(removida.seq, removida) for removida in removidas],
+        key=lambda item: item[0]
+    )
+    mais = len(eventos) > limite
+    eventos = eventos[:limite]
+    
+    return {
+        "desde": desde,
+        "ultima_seq": eventos[-1][0] if eventos else desde,
+        "mais": mais,
+        "alteradas": [item for _, item in eventos if isinstance(item, Consulta)],
+        "removidas": [
+            ConsultaRemovidaResponse(id=item.consulta_id, seq=item.seq, removida_em=item.removida_em)
+            for _, item in eventos if isinstance(item, ConsultaRemovida)
+        ]
+    }
+
+def _eventos_desde(desde: int, limite: int):
+    """Eventos do feed a partir do banco, com sessão própria (usada pelo stream SSE)"""
+    db = SessionLocal()
+    try:
+        mudancas = _buscar_mudancas(db, desde, limite)
+        eventos = [_evento_alterada(consulta) for consulta in mudancas["alteradas"]]
+        eventos += [
+            {"tipo": "removida", "seq": removida.seq, "consulta": removida.model_dump(mode="json")}
+            for removida in mudancas["removidas"]
+        ]
+        eventos.sort(key=lambda evento: evento["seq"])
+        return eventos, mudancas["mais"]
+    finally:
+        db.close()
+
+def _formatar_sse(evento: dict) -> str:
+    return f"id: {evento['seq']}\nevent: {evento['tipo']}\ndata: {json.dumps(evento['consulta'])}\n\n"
+
 @router.post("/", response_model=ConsultaResponse, status_code=status.HTTP_201_CREATED)
 def criar_consulta(
     consulta: ConsultaCreate,
@@ -31,9 +149,13 @@ def criar_consulta(
         )
     
     nova_consulta = Consulta(**consulta.model_dump())
+    nova_consulta.seq = proxima_seq(db)
     db.add(nova_consulta)
     db.commit()
     db.refresh(nova_consulta)
+    _invalidar_agenda(nova_consulta)
+    publicar_mudanca(_evento_alterada(nova_consulta))
+    lembrete_consulta_alterada(nova_consulta.id, nova_consulta.data_hora, nova_consulta.status)
     
     # Registra log
     log = LogAcesso(
@@ -46,39 +168,408 @@ def criar_consulta(
     
     return nova_consulta
 
-@router.get("/", response_model=List[ConsultaResponse])
+@router.post("/lote", response_model=List[ConsultaResponse], status_code=status.HTTP_201_CREATED)
+def criar_consultas_lote(
+    lote: ConsultaLoteCreate,
+    db: Session = Depends(get_db),
+    usuario_atual: Usuario = Depends(obter_usuario_atual)
+):
+    """Cria várias consultas, expandindo recorrências, em uma única transação"""
+    
+    if usuario_atual.tipo not in ["admin", "medico"]:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Apenas admins e médicos podem agendar consultas"
+        )
+    
+    # Expande as regras de recorrência no servidor
+    linhas = []
+    for item in lote.consultas:
+        repeticoes, intervalo = 1, timedelta(0)
+        if item.recorrencia:
+            if item.recorrencia.frequencia not in INTERVALOS_RECORRENCIA:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Frequência deve ser 'diaria' ou 'semanal'"
+                )
+            if item.recorrencia.repeticoes < 1:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Repetições deve ser maior que zero"
+                )
+            repeticoes = item.recorrencia.repeticoes
+            intervalo = INTERVALOS_RECORRENCIA[item.recorrencia.frequencia]
+        dados = item.model_dump(exclude={"recorrencia"})
+        for i in range(repeticoes):
+            linhas.append({**dados, "data_hora": item.data_hora + i * intervalo})
+            if len(linhas) > LOTE_MAX_CONSULTAS:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=f"Limite de {LOTE_MAX_CONSULTAS} consultas por lote"
+                )
+    
+    if not linhas:
+        return []
+    
+    # Verifica todos os pacientes de uma vez
+    paciente_ids = {linha["paciente_id"] for linha in linhas}
+    existentes = {
+        paciente_id for (paciente_id,) in
+        db.query(Paciente.id).filter(Paciente.id.in_(paciente_ids)).all()
+    }
+    faltando = paciente_ids - existentes
+    if faltando:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Pacientes não encontrados: {sorted(faltando)}"
+        )
+    
+    ultima_seq = proxima_seq(db, len(linhas))
+    for i, linha in enumerate(linhas):
+        linha["seq"] = ultima_seq - len(linhas) + 1 + i
+    
+    # INSERT em lote; os ids crescem na ordem do pedido
+    novas_consultas = db.scalars(
+        insert(Consulta).returning(Consulta).options(undefer(Consulta.observacoes)),
+        linhas
+    ).all()
+    novas_consultas = sorted(novas_consultas, key=lambda consulta: consulta.id)
+    
+    # Serializa antes do commit, que expira os objetos carregados
+    resposta = [ConsultaResponse.model_validate(consulta) for consulta in novas_consultas]
+    eventos = [_evento_alterada(consulta) for consulta in novas_consultas]
+    
+    # Registra um único log para o lote
+    log = LogAcesso(
+        usuario_id=usuario_atual.id,
+        acao="CRIAR_CONSULTAS_LOTE",
+        detalhes=f"{len(novas_consultas)} consultas criadas em lote - IDs: "
+                 f"{[consulta.id for consulta in resposta]}"
+    )
+    db.add(log)
+    db.commit()
+    
+    for consulta in resposta:
+        invalidar_agenda(consulta.medico_nome, consulta.data_hora.date())
+        lembrete_consulta_alterada(consulta.id, consulta.data_hora, consulta.status)
+    for evento in eventos:
+        publicar_mudanca(evento)
+    
+    return resposta
+
+@router.patch("/lote", response_model=ConsultaLoteResultado)
+def atualizar_consultas_lote(
+    lote: ConsultaLoteUpdate,
+    db: Session = Depends(get_db),
+    usuario_atual: Usuario = Depends(obter_usuario_atual)
+):
+    """Atualiza o status de várias consultas por lista de IDs ou filtro"""
+    
+    if usuario_atual.tipo not in ["admin", "medico"]:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Apenas admins e médicos podem atualizar consultas"
+        )
+    
+    if lote.status not in STATUS_CONSULTA:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Status deve ser um de: {', '.join(STATUS_CONSULTA)}"
+        )
+    
+    condicoes = []
+    if lote.ids is not None:
+        if len(lote.ids) > LOTE_MAX_CONSULTAS:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Limite de {LOTE_MAX_CONSULTAS} consultas por lote"
+            )
+        condicoes.append(Consulta.id.in_(lote.ids))
+    if lote.filtro is not None:
+        filtro = lote.filtro
+        if filtro.medico_nome is not None:
+            condicoes.append(Consulta.medico_nome == filtro.medico_nome)
+        if filtro.paciente_id is not None:
+            condicoes.append(Consulta.paciente_id == filtro.paciente_id)
+        if filtro.status is not None:
+            condicoes.append(Consulta.status == filtro.status)
+        if filtro.de is not None:
+            condicoes.append(Consulta.data_hora >= filtro.de)
+        if filtro.ate is not None:
+            condicoes.append(Consulta.data_hora <= filtro.ate)
+    
+    # Evita atualizar a tabela inteira por engano
+    if not condicoes:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Informe uma lista de IDs ou ao menos um filtro"
+        )
+    
+    # Toca a sequência antes de ler: o pysqlite só abre a transação no primeiro DML, e assim
+    # o SELECT abaixo já roda com o lock de escrita, sem outra escrita entre ele e o UPDATE
+    proxima_seq(db, 0)
+    
+    # O limite do lote também vale para filtros
+    ids_lote = db.scalars(
+        select(Consulta.id).where(*condicoes).order_by(Consulta.id).limit(LOTE_MAX_CONSULTAS + 1)
+    ).all()
+    if len(ids_lote) > LOTE_MAX_CONSULTAS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"O filtro seleciona mais de {LOTE_MAX_CONSULTAS} consultas; restrinja o filtro"
+        )
+    
+    afetadas = []
+    if ids_lote:
+        # Cada consulta recebe sua própria seq para o feed de mudanças, no mesmo UPDATE
+        ultima_seq = proxima_seq(db, len(ids_lote))
+        primeira_seq = ultima_seq - len(ids_lote) + 1
+        afetadas = db.scalars(
+            update(Consulta)
+            .where(Consulta.id.in_(ids_lote), *condicoes)
+            .values(
+                status=lote.status,
+                seq=case(
+                    {consulta_id: primeira_seq + i for i, consulta_id in enumerate(ids_lote)},
+                    value=Consulta.id
+                )
+            )
+            .returning(Consulta)
+            .options(undefer(Consulta.observacoes))
+            .execution_options(synchronize_session=False)
+        ).all()
+    afetadas = sorted(afetadas, key=lambda consulta: consulta.id)
+    ids = [consulta.id for consulta in afetadas]
+    
+    eventos = [_evento_alterada(consulta) for consulta in afetadas]
+    dias_agenda = {(consulta.medico_nome, consulta.data_hora.date()) for consulta in afetadas}
+    lembretes = [(consulta.id, consulta.data_hora, consulta.status) for consulta in afetadas]
+    
+    # Registra um único log para o lote
+    log = LogAcesso(
+        usuario_id=usuario_atual.id,
+        acao="ATUALIZAR_CONSULTAS_LOTE",
+        detalhes=f"{len(ids)} consultas alteradas para '{lote.status}' - IDs: {ids}"
+    )
+    db.add(log)
+    db.commit()
+    
+    for medico, dia in dias_agenda:
+        invalidar_agenda(medico, dia)
+    for consulta_id, data_hora, status_consulta in lembretes:
+        lembrete_consulta_alterada(consulta_id, data_hora, status_consulta)
+    for evento in eventos:
+        publicar_mudanca(evento)
+    
+    return {"total": len(ids), "ids": ids}
+
+@router.get("/", response_model=List[ConsultaParcial], response_model_exclude_unset=True)
 def listar_consultas(
+    fields: Optional[str] = None,
     db: Session = Depends(get_db),
     usuario_atual: Usuario = Depends(obter_usuario_atual)
 ):
-    """Lista todas as consultas"""
+    """Lista todas as consultas; ?fields= escolhe os campos"""
+    
+    campos = resolver_campos(fields, ConsultaResponse, CONSULTA_CAMPOS_LISTA)
+    carga = carregar_apenas(Consulta, campos)
     
     if usuario_atual.tipo in ["admin", "medico"]:
         # Admin e médicos veem todas
-        consultas = db.query(Consulta).all()
+        consultas = db.query(Consulta).options(carga).all()
     elif usuario_atual.tipo == "paciente":
         # Pacientes veem apenas suas consultas
         paciente = db.query(Paciente).filter(Paciente.usuario_id == usuario_atual.id).first()
         if not paciente:
             return []
-        consultas = db.query(Consulta).filter(Consulta.paciente_id == paciente.id).all()
+        consultas = db.query(Consulta).options(carga).filter(Consulta.paciente_id == paciente.id).all()
     else:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Acesso negado"
         )
     
-    return consultas
+    return [projetar(consulta, campos) for consulta in consultas]
 
-@router.get("/{consulta_id}", response_model=ConsultaResponse)
+@router.get("/agenda", response_model=AgendaResponse)
+def obter_agenda(
+    medico: str,
+    de: date,
+    ate: Optional[date] = None,
+    granularidade: str = "dia",
+    db: Session = Depends(get_db),
+    usuario_atual: Usuario = Depends(obter_usuario_atual)
+):
+    """Agenda de um médico agrupada por dia ou semana (admin ou médico)"""
+    
+    if usuario_atual.tipo not in ["admin", "medico"]:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Apenas admins e médicos podem ver agendas"
+        )
+    
+    if ate is None:
+        ate = de
+    if granularidade not in ["dia", "semana"]:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Granularidade deve ser 'dia' ou 'semana'"
+        )
+    if ate < de:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Data final anterior à data inicial"
+        )
+    total_dias = (ate - de).days + 1
+    if total_dias > AGENDA_MAX_DIAS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Intervalo máximo da agenda é de {AGENDA_MAX_DIAS} dias"
+        )
+    
+    dias = [de + timedelta(days=i) for i in range(total_dias)]
+    versao = agenda_cache.versao()
+    por_dia, ausentes = agenda_cache.obter_varios(medico, dias)
+    
+    # Uma única consulta por intervalo cobre todos os dias fora do cache
+    if ausentes:
+        inicio = datetime.combine(ausentes[0], time.min)
+        fim = datetime.combine(ausentes[-1] + timedelta(days=1), time.min)
+        consultas = db.query(Consulta).options(undefer(Consulta.observacoes)).filter(
+            Consulta.medico_nome == medico,
+            Consulta.data_hora >= inicio,
+            Consulta.data_hora < fim
+        ).order_by(Consulta.data_hora, Consulta.id).all()
+        
+        novos = {dia: [] for dia in ausentes}
+        for consulta in consultas:
+            dia = consulta.data_hora.date()
+            if dia in novos:
+                novos[dia].append(ConsultaResponse.model_validate(consulta))
+        for dia, lista in novos.items():
+            agenda_cache.guardar(medico, dia, lista, versao)
+            por_dia[dia] = tuple(lista)
+    
+    # Agrupa os dias em blocos (semana começa na segunda-feira)
+    blocos = {}
+    for dia in dias:
+        inicio_bloco = dia if granularidade == "dia" else dia - timedelta(days=dia.weekday())
+        blocos.setdefault(inicio_bloco, []).extend(por_dia[dia])
+    
+    return {
+        "medico": medico,
+        "de": de,
+        "ate": ate,
+        "granularidade": granularidade,
+        "total": sum(len(lista) for lista in blocos.values()),
+        "blocos": [
+            {"inicio": inicio_bloco, "consultas": lista}
+            for inicio_bloco, lista in blocos.items()
+        ]
+    }
+
+@router.get("/mudancas", response_model=MudancasResponse)
+def listar_mudancas(
+    desde: int = 0,
+    limite: int = MUDANCAS_LIMITE_PADRAO,
+    db: Session = Depends(get_db),
+    usuario_atual: Usuario = Depends(obter_usuario_atual)
+):
+    """Feed incremental de mudanças nas consultas (admin ou médico)"""
+    
+    if usuario_atual.tipo not in ["admin", "medico"]:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Apenas admins e médicos podem acompanhar mudanças"
+        )
+    
+    if limite < 1 or limite > MUDANCAS_LIMITE_MAX:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Limite deve estar entre 1 e {MUDANCAS_LIMITE_MAX}"
+        )
+    
+    return _buscar_mudancas(db, desde, limite)
+
+@router.get("/mudancas/stream")
+async def stream_mudancas(
+    request: Request,
+    desde: Optional[int] = None,
+    last_event_id: Optional[int] = Header(None),
+    db: Session = Depends(get_db),
+    usuario_atual: Usuario = Depends(obter_usuario_atual)
+):
+    """Stream SSE das mudanças nas consultas; retoma a partir de `desde` ou Last-Event-ID"""
+    
+    if usuario_atual.tipo not in ["admin", "medico"]:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Apenas admins e médicos podem acompanhar mudanças"
+        )
+    
+    # Devolve ao pool a conexão da autenticação; o stream abre sessões próprias quando precisa
+    db.close()
+    
+    inicio = last_event_id if last_event_id is not None else desde
+    
+    async def repor_do_banco(desde: int):
+        mais = True
+        while mais:
+            eventos, mais = await run_in_threadpool(_eventos_desde, desde, MUDANCAS_LIMITE_PADRAO)
+            for evento in eventos:
+                desde = evento["seq"]
+                yield evento
+    
+    async def gerar_eventos():
+        # Inscreve antes de ler o banco para não perder mudanças no intervalo
+        fila = broker_mudancas.inscrever()
+        try:
+            ultima_seq = inicio
+            if ultima_seq is not None:
+                async for evento in repor_do_banco(ultima_seq):
+                    ultima_seq = evento["seq"]
+                    yield _formatar_sse(evento)
+            
+            while not await request.is_disconnected():
+                try:
+                    evento = await asyncio.wait_for(fila.get(), timeout=SSE_KEEPALIVE)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                if evento is None:
+                    break
+                if ultima_seq is not None and evento["seq"] > ultima_seq + 1:
+                    # A seq não tem lacunas: o que falta chegou fora de ordem (commits concorrentes,
+                    # repasse entre workers) e é lido do banco antes deste evento
+                    async for anterior in repor_do_banco(ultima_seq):
+                        ultima_seq = anterior["seq"]
+                        yield _formatar_sse(anterior)
+                if ultima_seq is not None and evento["seq"] <= ultima_seq:
+                    continue
+                ultima_seq = evento["seq"]
+                yield _formatar_sse(evento)
+        finally:
+            broker_mudancas.cancelar(fila)
+    
+    return StreamingResponse(
+        gerar_eventos(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.get("/{consulta_id}", response_model=ConsultaParcial, response_model_exclude_unset=True)
 def obter_consulta(
     consulta_id: int,
+    fields: Optional[str] = None,
     db: Session = Depends(get_db),
     usuario_atual: Usuario = Depends(obter_usuario_atual)
 ):
-    """Obtém detalhes de uma consulta específica"""
+    """Obtém detalhes de uma consulta específica; ?fields= escolhe os campos"""
     
-    consulta = db.query(Consulta).filter(Consulta.id == consulta_id).first()
+    campos = resolver_campos(fields, ConsultaResponse)
+    consulta = db.query(Consulta).options(
+        carregar_apenas(Consulta, campos)
+    ).filter(Consulta.id == consulta_id).first()
     if not consulta:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -94,7 +585,7 @@ def obter_consulta(
                 detail="Você só pode acessar suas próprias consultas"
             )
     
-    return consulta
+    return projetar(consulta, campos)
 
 @router.put("/{consulta_id}", response_model=ConsultaResponse)
 def atualizar_consulta(
@@ -118,13 +609,21 @@ def atualizar_consulta(
             detail="Consulta não encontrada"
         )
     
+    # Dia da agenda antes da alteração
+    medico_anterior, dia_anterior = consulta.medico_nome, consulta.data_hora.date()
+    
     # Atualiza campos
     update_data = consulta_update.model_dump(exclude_unset=True)
     for campo, valor in update_data.items():
         setattr(consulta, campo, valor)
+    consulta.seq = proxima_seq(db)
     
     db.commit()
     db.refresh(consulta)
+    invalidar_agenda(medico_anterior, dia_anterior)
+    _invalidar_agenda(consulta)
+    publicar_mudanca(_evento_alterada(consulta))
+    lembrete_consulta_alterada(consulta.id, consulta.data_hora, consulta.status)
     
     # Registra log
     log = LogAcesso(
@@ -166,7 +665,20 @@ def deletar_consulta(
     )
     db.add(log)
     
+    # Tombstone para o feed de mudanças
+    removida = ConsultaRemovida(
+        seq=proxima_seq(db),
+        consulta_id=consulta_id,
+        removida_em=datetime.utcnow()
+    )
+    db.add(removida)
+    evento = _evento_removida(removida)
+    
+    medico, dia = consulta.medico_nome, consulta.data_hora.date()
     db.delete(consulta)
     db.commit()
+    invalidar_agenda(medico, dia)
+    publicar_mudanca(evento)
+    lembrete_consulta_removida(consulta_id)
     
     return None
\ No newline at end of file
@@ -1,19 +1,39 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
+from datetime import date
 from app.database import get_db
 from app.models import Paciente, Usuario, LogAcesso
-from app.schemas import PacienteResponse, PacienteUpdate
+from app.schemas import PacienteResponse, PacienteParcial, PacienteUpdate
 from app.auth import obter_usuario_atual
+from app.campos import resolver_campos, carregar_apenas, projetar
 
 router = APIRouter(prefix="/pacientes", tags=["Pacientes"])
 
-@router.get("/", response_model=List[PacienteResponse])
+def _subtrair_anos(dia: date, anos: int) -> date:
+    """Mesma data `anos` antes (29/02 vira 28/02 em anos não bissextos)"""
+    try:
+        return dia.replace(year=dia.year - anos)
+    except ValueError:
+        return dia.replace(year=dia.year - anos, day=28)
+
+# Maior idade aceita nos filtros (mantém o ano calculado dentro do intervalo de date)
+IDADE_MAX = 150
+
+# Campos da listagem quando ?fields= não é informado (sem as colunas grandes)
+PACIENTE_CAMPOS_LISTA = [
+    "id", "usuario_id", "cpf", "telefone", "data_nascimento", "criado_em", "atualizado_em"
+]
+
+@router.get("/", response_model=List[PacienteParcial], response_model_exclude_unset=True)
 def listar_pacientes(
+    fields: Optional[str] = None,
+    idade_min: Optional[int] = Query(None, ge=0, le=IDADE_MAX),
+    idade_max: Optional[int] = Query(None, ge=0, le=IDADE_MAX),
     db: Session = Depends(get_db),
     usuario_atual: Usuario = Depends(obter_usuario_atual)
 ):
-    """Lista todos os pacientes (apenas admin e médicos)"""
+    """Lista os pacientes (apenas admin e médicos), com filtro opcional por faixa etária"""
     
     if usuario_atual.tipo not in ["admin", "medico"]:
         raise HTTPException(
@@ -21,7 +41,25 @@ def listar_pacientes(
             detail="Acesso negado"
         )
     
-    pacientes = db.query(Paciente).all()
+    if idade_min is not None and idade_max is not None and idade_min > idade_max:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="idade_min maior que idade_max"
+        )
+    
+    campos = resolver_campos(fields, PacienteResponse, PACIENTE_CAMPOS_LISTA)
+    query = db.query(Paciente).options(carregar_apenas(Paciente, campos))
+    
+    # Faixa etária vira intervalo em data_nascimento (usa o índice)
+    hoje = date.today()
+    if idade_min is not None:
+        query = query.filter(Paciente.data_nascimento <= _subtrair_anos(hoje, idade_min))
+    if idade_max is not None:
+        query = query.filter(Paciente.data_nascimento > _subtrair_anos(hoje, idade_max + 1))
+    pacientes = query.all()
+    
+    # Projeta antes do commit, que expira os objetos carregados
+    resposta = [projetar(paciente, campos) for paciente in pacientes]
     
     # Registra log
     log = LogAcesso(
@@ -32,10 +70,11 @@ def listar_pacientes(
     db.add(log)
     db.commit()
     
-    return pacientes
+    return resposta
 
-@router.get("/me", response_model=PacienteResponse)
+@router.get("/me", response_model=PacienteParcial, response_model_exclude_unset=True)
 def obter_meu_perfil(
+    fields: Optional[str] = None,
     db: Session = Depends(get_db),
     usuario_atual: Usuario = Depends(obter_usuario_atual)
 ):
@@ -47,18 +86,22 @@ def obter_meu_perfil(
             detail="Apenas pacientes podem acessar este endpoint"
         )
     
-    paciente = db.query(Paciente).filter(Paciente.usuario_id == usuario_atual.id).first()
+    campos = resolver_campos(fields, PacienteResponse)
+    paciente = db.query(Paciente).options(
+        carregar_apenas(Paciente, campos)
+    ).filter(Paciente.usuario_id == usuario_atual.id).first()
     if not paciente:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Perfil de paciente não encontrado"
         )
     
-    return paciente
+    return projetar(paciente, campos)
 
-@router.get("/{paciente_id}", response_model=PacienteResponse)
+@router.get("/{paciente_id}", response_model=PacienteParcial, response_model_exclude_unset=True)
 def obter_paciente(
     paciente_id: int,
+    fields: Optional[str] = None,
     db: Session = Depends(get_db),
     usuario_atual: Usuario = Depends(obter_usuario_atual)
 ):
@@ -73,23 +116,27 @@ def obter_paciente(
                 detail="Você só pode acessar seus próprios dados"
             )
     
-    paciente = db.query(Paciente).filter(Paciente.id == paciente_id).first()
+    campos = resolver_campos(fields, PacienteResponse)
+    paciente = db.query(Paciente).options(
+        carregar_apenas(Paciente, campos)
+    ).filter(Paciente.id == paciente_id).first()
     if not paciente:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Paciente não encontrado"
         )
+    resposta = projetar(paciente, campos)
     
     # Registra log (LGPD)
     log = LogAcesso(
         usuario_id=usuario_atual.id,
         acao="ACESSAR_DADOS_PACIENTE",
-        detalhes=f"Acesso aos dados do paciente ID: {paciente_id}"
+        detalhes=f"Acesso aos dados do paciente ID: {paciente_id} - campos: {', '.join(campos)}"
     )
     db.add(log)
     db.commit()
     
-    return paciente
+    return resposta
 
 @router.put("/{paciente_id}", response_model=PacienteResponse)
 def atualizar_paciente(
@@ -1,6 +1,37 @@
-from pydantic import BaseModel, EmailStr
-from datetime import datetime
-from typing import Optional
+from pydantic import BaseModel, EmailStr, BeforeValidator
+from datetime import datetime, date
+from typing import Optional, List, Annotated
+
+# Formatos aceitos para datas de nascimento (o primeiro é o armazenado)
+FORMATOS_DATA_NASCIMENTO = ["%Y-%m-%d", "%d/%m/%Y", "%d-%m-%Y", "%Y/%m/%d"]
+
+def normalizar_data_nascimento(valor):
+    """Converte a data de nascimento para date, aceitando os formatos legados"""
+    if valor is None:
+        return None
+    if isinstance(valor, datetime):
+        data = valor.date()
+    elif isinstance(valor, date):
+        data = valor
+    elif isinstance(valor, str):
+        texto = valor.strip()
+        if not texto:
+            return None
+        for formato in FORMATOS_DATA_NASCIMENTO:
+            try:
+                data = datetime.strptime(texto, formato).date()
+                break
+            except ValueError:
+                continue
+        else:
+            raise ValueError("Data de nascimento inválida, use AAAA-MM-DD ou DD/MM/AAAA")
+    else:
+        raise ValueError("Data de nascimento inválida")
+    if data > date.today():
+        raise ValueError("Data de nascimento não pode estar no futuro")
+    return data
+
+DataNascimento = Annotated[date, BeforeValidator(normalizar_data_nascimento)]
 
 # Schemas de Usuário
 class UsuarioBase(BaseModel):
@@ -13,7 +44,7 @@ class UsuarioCreate(UsuarioBase):
     # Campos opcionais para pacientes
     cpf: Optional[str] = None
     telefone: Optional[str] = None
-    data_nascimento: Optional[str] = None
+    data_nascimento: Optional[DataNascimento] = None
     endereco: Optional[str] = None
     historico_medico: Optional[str] = None
 
@@ -32,7 +63,7 @@ class UsuarioResponse(UsuarioBase):
 class PacienteBase(BaseModel):
     cpf: str
     telefone: Optional[str] = None
-    data_nascimento: Optional[str] = None
+    data_nascimento: Optional[DataNascimento] = None
     endereco: Optional[str] = None
     historico_medico: Optional[str] = None
 
@@ -41,7 +72,7 @@ class PacienteCreate(PacienteBase):
 
 class PacienteUpdate(BaseModel):
     telefone: Optional[str] = None
-    data_nascimento: Optional[str] = None
+    data_nascimento: Optional[DataNascimento] = None
     endereco: Optional[str] = None
     historico_medico: Optional[str] = None
 
@@ -54,6 +85,18 @@ class PacienteResponse(PacienteBase):
     class Config:
         from_attributes = True
 
+# Resposta parcial (?fields=): apenas os campos pedidos são enviados
+class PacienteParcial(BaseModel):
+    id: Optional[int] = None
+    usuario_id: Optional[int] = None
+    cpf: Optional[str] = None
+    telefone: Optional[str] = None
+    data_nascimento: Optional[DataNascimento] = None
+    endereco: Optional[str] = None
+    historico_medico: Optional[str] = None
+    criado_em: Optional[datetime] = None
+    atualizado_em: Optional[datetime] = None
+
 # Schemas de Consulta
 class ConsultaBase(BaseModel):
     medico_nome: str
@@ -73,10 +116,76 @@ class ConsultaResponse(ConsultaBase):
     paciente_id: int
     status: str
     criado_em: datetime
+    seq: Optional[int] = None
     
     class Config:
         from_attributes = True
 
+# Resposta parcial (?fields=): apenas os campos pedidos são enviados
+class ConsultaParcial(BaseModel):
+    id: Optional[int] = None
+    paciente_id: Optional[int] = None
+    medico_nome: Optional[str] = None
+    data_hora: Optional[datetime] = None
+    tipo: Optional[str] = None
+    status: Optional[str] = None
+    observacoes: Optional[str] = None
+    criado_em: Optional[datetime] = None
+    seq: Optional[int] = None
+
+# Schemas de Operações em Lote
+class RecorrenciaRegra(BaseModel):
+    frequencia: str = "semanal"  # diaria, semanal
+    repeticoes: int  # total de ocorrências, incluindo a primeira
+
+class ConsultaLoteItem(ConsultaCreate):
+    recorrencia: Optional[RecorrenciaRegra] = None
+
+class ConsultaLoteCreate(BaseModel):
+    consultas: List[ConsultaLoteItem]
+
+class ConsultaFiltro(BaseModel):
+    medico_nome: Optional[str] = None
+    paciente_id: Optional[int] = None
+    status: Optional[str] = None
+    de: Optional[datetime] = None
+    ate: Optional[datetime] = None
+
+class ConsultaLoteUpdate(BaseModel):
+    status: str  # agendada, realizada, cancelada
+    ids: Optional[List[int]] = None
+    filtro: Optional[ConsultaFiltro] = None
+
+class ConsultaLoteResultado(BaseModel):
+    total: int
+    ids: List[int]
+
+# Schemas do Feed de Mudanças
+class ConsultaRemovidaResponse(BaseModel):
+    id: int
+    seq: int
+    removida_em: datetime
+
+class MudancasResponse(BaseModel):
+    desde: int
+    ultima_seq: int  # usar como próximo "desde"
+    mais: bool  # há mais mudanças além do limite
+    alteradas: List[ConsultaResponse]
+    removidas: List[ConsultaRemovidaResponse]
+
+# Schemas de Agenda
+class AgendaBloco(BaseModel):
+    inicio: date  # primeiro dia do bloco (dia ou segunda-feira da semana)
+    consultas: List[ConsultaResponse]
+
+class AgendaResponse(BaseModel):
+    medico: str
+    de: date
+    ate: date
+    granularidade: str  # dia, semana
+    total: int
+    blocos: List[AgendaBloco]
+
 # Schema de Token - CORRIGIDO para consistência
 class Token(BaseModel):
     token: str  
@@ -0,0 +1,220 @@
+"""Servidor de produção da HealthAPI com vários workers (prefork).
+
+O processo principal importa a aplicação uma única vez (criação das tabelas e
+migrações incluídas), abre o socket de escuta e cria N workers com fork. Cada
+worker recria o pool do banco, aquece as conexões e o bcrypt e só então passa a
+aceitar requisições. As invalidações de cache passam pelo processo principal
+(ver app/canal.py). Workers que terminam inesperadamente são recriados.
+
+    python -m app.servidor --workers 4 --port 8000
+"""
+import argparse
+import logging
+import os
+import selectors
+import signal
+import socket
+import time
+import uvicorn
+from sqlalchemy import text
+
+logger = logging.getLogger("healthapi.servidor")
+
+# Tempo para os workers encerrarem antes do SIGKILL (segundos)
+TEMPO_ENCERRAMENTO = 30
+
+# Espera antes de recriar um worker que terminou (evita laço de falhas rápidas)
+ATRASO_REINICIO = 1
+
+def criar_socket(host: str, port: int, backlog: int = 2048) -> socket.socket:
+    """Socket de escuta compartilhado por todos os workers"""
+    sock = socket.socket(socket.AF_INET6 if ":" in host else socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+def aquecer_worker(conexoes: int) -> None:
+    """Recria o pool do banco após o fork e aquece conexões e bcrypt"""
+    from app.database import engine
+    from app.auth import pwd_context
+
+    # Conexões herdadas do processo principal não podem ser usadas no filho
+    engine.dispose(close=False)
+    abertas = [engine.connect() for _ in range(conexoes)]
+    for conn in abertas:
+        conn.execute(text("SELECT 1"))
+    for conn in abertas:
+        conn.close()
+
+    pwd_context.verify("aquecimento", pwd_context.hash("aquecimento"))
+
+def executar_worker(app, indice: int, sock: socket.socket, canal_sock, args) -> None:
+    from app.canal import canal
+
+    if canal_sock is not None:
+        canal.conectar(canal_sock)
+    # Agendador de lembretes e outbox rodam em um único worker
+    app.state.tarefas_segundo_plano = indice == 0
+    aquecer_worker(args.conexoes)
+
+    config = uvicorn.Config(app, log_level=args.log_level, access_log=args.access_log)
+    uvicorn.Server(config).run(sockets=[sock])
+
+class Mestre:
+    """Cria e supervisiona os workers e repassa as mensagens do canal entre eles"""
+
+    def __init__(self, app, sock: socket.socket, args):
+        self.app = app
+        self.sock = sock
+        self.args = args
+        self.workers = {}  # pid -> (indice, socket do canal)
+        self.buffers = {}  # pid -> bytes recebidos ainda sem quebra de linha
+        self.reinicios = {}  # indice -> horário (monotonic) para recriar o worker
+        self.seletor = selectors.DefaultSelector()
+        self.parando = False
+
+    def iniciar_worker(self, indice: int) -> None:
+        sock_mestre, sock_worker = socket.socketpair()
+        pid = os.fork()
+        if pid == 0:
+            # Processo filho
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            sock_mestre.close()
+            for _, canal in self.workers.values():
+                canal.close()
+            codigo = 0
+            try:
+                executar_worker(self.app, indice, self.sock, sock_worker, self.args)
+            except Exception:
+                logger.exception("Worker %s encerrado com erro", indice)
+                codigo = 1
+            finally:
+                os._exit(codigo)
+
+        sock_worker.close()
+        self.workers[pid] = (indice, sock_mestre)
+        self.buffers[pid] = b""
+        self.seletor.register(sock_mestre, selectors.EVENT_READ, pid)
+        logger.info("Worker %s iniciado (pid %s)", indice, pid)
+
+    def remover_worker(self, pid: int):
+        indice, canal = self.workers.pop(pid)
+        self.buffers.pop(pid, None)
+        self.seletor.unregister(canal)
+        canal.close()
+        return indice
+
+    def repassar(self, pid: int) -> None:
+        """Lê mensagens de um worker e envia as linhas completas aos demais"""
+        _, canal = self.workers[pid]
+        dados = canal.recv(65536)
+        if not dados:
+            return
+        dados = self.buffers[pid] + dados
+        completas, _, resto = dados.rpartition(b"\n")
+        self.buffers[pid] = resto
+        if not completas:
+            return
+        for outro, (_, destino) in list(self.workers.items()):
+            if outro != pid:
+                try:
+                    destino.sendall(completas + b"\n")
+                except OSError:
+                    pass
+
+    def verificar_workers(self) -> None:
+        """Agenda a recriação dos workers que terminaram inesperadamente"""
+        while self.workers:
+            pid, status = os.waitpid(-1, os.WNOHANG)
+            if pid == 0:
+                return
+            if pid not in self.workers:
+                continue
+            indice = self.remover_worker(pid)
+            if not self.parando:
+                logger.warning("Worker %s (pid %s) terminou com status %s; recriando", indice, pid, status)
+                # Não bloqueia aqui: o repasse entre os outros workers continua enquanto isso
+                self.reinicios[indice] = time.monotonic() + ATRASO_REINICIO
+
+    def reiniciar_pendentes(self) -> None:
+        agora = time.monotonic()
+        for indice, horario in list(self.reinicios.items()):
+            if horario <= agora:
+                del self.reinicios[indice]
+                self.iniciar_worker(indice)
+
+    def parar(self, *_):
+        self.parando = True
+
+    def executar(self) -> None:
+        from app.database import engine
+
+        # Fecha as conexões abertas durante a importação antes de criar os filhos
+        engine.dispose()
+        signal.signal(signal.SIGTERM, self.parar)
+        signal.signal(signal.SIGINT, self.parar)
+        for indice in range(self.args.workers):
+            self.iniciar_worker(indice)
+
+        while not self.parando:
+            espera = 1
+            if self.reinicios:
+                espera = max(0, min(espera, min(self.reinicios.values()) - time.monotonic()))
+            for chave, _ in self.seletor.select(timeout=espera):
+                if chave.data in self.workers:
+                    self.repassar(chave.data)
+            self.verificar_workers()
+            if not self.parando:
+                self.reiniciar_pendentes()
+
+        self.encerrar()
+
+    def encerrar(self) -> None:
+        for pid in list(self.workers):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+        limite = time.monotonic() + TEMPO_ENCERRAMENTO
+        while self.workers and time.monotonic() < limite:
+            pid, _ = os.waitpid(-1, os.WNOHANG)
+            if pid == 0:
+                time.sleep(0.1)
+            elif pid in self.workers:
+                self.remover_worker(pid)
+        for pid in list(self.workers):
+            os.kill(pid, signal.SIGKILL)
+            os.waitpid(pid, 0)
+            self.remover_worker(pid)
+        self.sock.close()
+
+def criar_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Servidor da HealthAPI")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=int(os.environ.get("HEALTHAPI_WORKERS", "1")),
+                        help="processos worker (padrão: $HEALTHAPI_WORKERS ou 1)")
+    parser.add_argument("--conexoes", type=int, default=5, help="conexões do pool aquecidas por worker")
+    parser.add_argument("--log-level", default="info")
+    parser.add_argument("--access-log", action=argparse.BooleanOptionalAction, default=True)
+    return parser
+
+def main(app=None, argv=None) -> None:
+    args = criar_parser().parse_args(argv)
+    logging.basicConfig(level=args.log_level.upper(), format="%(levelname)s: %(message)s")
+
+    # Pré-carrega a aplicação no processo principal (compartilhada pelos filhos)
+    if app is None:
+        from app.main import app
+
+    sock = criar_socket(args.host, args.port)
+    if args.workers <= 1:
+        executar_worker(app, 0, sock, None, args)
+    else:
+        Mestre(app, sock, args).executar()
+
+if __name__ == "__main__":
+    main()
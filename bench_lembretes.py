@@ -0,0 +1,213 @@
+"""Benchmark do agendador de lembretes com um volume grande de consultas.
+
+Cria um banco temporário com N consultas agendadas dentro da janela do
+agendador e mede carga da heap, atualizações incrementais, gravação no
+outbox e drenagem pelo trabalhador. O relógio é simulado.
+
+Termina com código 1 se alguma medida passar dos limites (ajustáveis pelos
+argumentos --min-*/--max-*) ou se o outbox não bater com o que foi gravado.
+O banco temporário é apagado no final (use --manter para inspecioná-lo).
+
+    python bench_lembretes.py --consultas 1000000
+"""
+import argparse
+import os
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from sqlalchemy import bindparam, create_engine, event, func, insert, select, update
+from sqlalchemy.orm import sessionmaker
+from app.database import Base, configurar_sqlite
+from app.models import Consulta, LembreteOutbox
+from app.lembretes import AgendadorLembretes, TrabalhadorOutbox, HORIZONTE, LOTE_OUTBOX
+
+class Relogio:
+    def __init__(self, inicio):
+        self.atual = inicio
+
+    def __call__(self):
+        return self.atual
+
+def percentis(amostras):
+    amostras = sorted(amostras)
+    return {
+        "p50": statistics.median(amostras),
+        "p99": amostras[min(len(amostras) - 1, int(len(amostras) * 0.99))],
+        "max": amostras[-1],
+    }
+
+def formatar_ms(valores):
+    return ", ".join(f"{nome}={valor * 1000:.3f}ms" for nome, valor in valores.items())
+
+def popular(engine, quantidade, inicio):
+    """Insere `quantidade` consultas agendadas espalhadas pela janela do agendador"""
+    janela = int(HORIZONTE.total_seconds()) - 60
+    lote = 50000
+    with engine.begin() as conn:
+        for deslocamento in range(0, quantidade, lote):
+            conn.execute(insert(Consulta), [
+                {
+                    "paciente_id": 1,
+                    "medico_nome": f"Dr {i % 50}",
+                    "data_hora": inicio + timedelta(seconds=60 + random.randrange(janela)),
+                    "tipo": "presencial",
+                    "status": "agendada",
+                    "seq": i + 1,
+                }
+                for i in range(deslocamento, min(deslocamento + lote, quantidade))
+            ])
+
+def gravar_alteracoes(engine, alteracoes):
+    """Aplica no banco o estado final das consultas alteradas (como as rotas fariam)"""
+    with engine.begin() as conn:
+        conn.execute(
+            update(Consulta).where(Consulta.id == bindparam("b_id"))
+            .values(data_hora=bindparam("b_data_hora"), status=bindparam("b_status")),
+            [
+                {"b_id": consulta_id, "b_data_hora": data_hora, "b_status": status}
+                for consulta_id, (data_hora, status) in alteracoes.items()
+            ]
+        )
+
+class Verificacao:
+    def __init__(self):
+        self.falhas = []
+
+    def __call__(self, ok, descricao):
+        print(f"  {'OK   ' if ok else 'FALHA'} {descricao}")
+        if not ok:
+            self.falhas.append(descricao)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--consultas", type=int, default=1_000_000)
+    parser.add_argument("--atualizacoes", type=int, default=100_000)
+    parser.add_argument("--passo-minutos", type=int, default=10, help="avanço do relógio simulado")
+    parser.add_argument("--manter", action="store_true", help="não apaga o banco temporário")
+    # Limites (cerca de 1/4 do medido com 1M consultas em 1 CPU; ver histórico do git)
+    parser.add_argument("--min-carga", type=float, default=100_000, help="consultas/s na carga da janela")
+    parser.add_argument("--min-atualizacoes", type=float, default=100_000, help="atualizações/s")
+    parser.add_argument("--max-p99-atualizacao-ms", type=float, default=1.0)
+    parser.add_argument("--min-outbox", type=float, default=9_000, help="lembretes/s gravados no outbox")
+    parser.add_argument("--max-p99-lote-ms", type=float, default=300, help="p99 por lote de LOTE_OUTBOX")
+    parser.add_argument("--min-trabalhador", type=float, default=14_000, help="lembretes/s enviados")
+    args = parser.parse_args()
+
+    random.seed(42)
+    diretorio = tempfile.mkdtemp(prefix="bench-lembretes-")
+    try:
+        falhas = executar(args, diretorio)
+    finally:
+        if args.manter:
+            print(f"\nBanco temporário: {diretorio}")
+        else:
+            shutil.rmtree(diretorio, ignore_errors=True)
+
+    if falhas:
+        print(f"\n{len(falhas)} verificação(ões) falharam")
+        sys.exit(1)
+    print("\nTodas as verificações passaram")
+
+def executar(args, diretorio):
+    engine = create_engine(f"sqlite:///{os.path.join(diretorio, 'bench.db')}")
+    event.listen(engine, "connect", configurar_sqlite)  # mesmo modo de journal da API
+    Base.metadata.create_all(bind=engine)
+    fabrica = sessionmaker(bind=engine)
+    inicio = datetime(2026, 1, 5, 8, 0)
+    relogio = Relogio(inicio)
+    verificar = Verificacao()
+
+    t0 = time.perf_counter()
+    popular(engine, args.consultas, inicio)
+    print(f"Banco populado com {args.consultas} consultas em {time.perf_counter() - t0:.1f}s")
+
+    agendador = AgendadorLembretes(fabrica_sessao=fabrica, agora=relogio)
+
+    # 1. Carga inicial da janela (consulta indexada + heapify)
+    t0 = time.perf_counter()
+    carregadas = agendador.carregar_janela()
+    duracao = time.perf_counter() - t0
+    print(f"\n[carga] {carregadas} consultas / {len(agendador._heap)} lembretes na heap "
+          f"em {duracao:.2f}s ({carregadas / duracao:,.0f} consultas/s)")
+    verificar(carregadas == args.consultas, f"todas as {args.consultas} consultas carregadas")
+    verificar(carregadas / duracao >= args.min_carga, f"carga >= {args.min_carga:,.0f} consultas/s")
+
+    # 2. Atualizações incrementais vindas das rotas (reagendar / cancelar)
+    latencias, alteracoes = [], {}
+    t0 = time.perf_counter()
+    for _ in range(args.atualizacoes):
+        consulta_id = random.randint(1, args.consultas)
+        nova_data = inicio + timedelta(minutes=random.randint(5, int(HORIZONTE.total_seconds() // 60) - 5))
+        status = "cancelada" if random.random() < 0.2 else "agendada"
+        antes = time.perf_counter()
+        agendador.consulta_alterada(consulta_id, nova_data, status)
+        latencias.append(time.perf_counter() - antes)
+        alteracoes[consulta_id] = (nova_data, status)
+    duracao = time.perf_counter() - t0
+    estatisticas = percentis(latencias)
+    print(f"[atualizações] {args.atualizacoes} em {duracao:.2f}s "
+          f"({args.atualizacoes / duracao:,.0f} ops/s) - {formatar_ms(estatisticas)}")
+    verificar(args.atualizacoes / duracao >= args.min_atualizacoes,
+              f"atualizações >= {args.min_atualizacoes:,.0f}/s")
+    verificar(estatisticas["p99"] * 1000 <= args.max_p99_atualizacao_ms,
+              f"p99 da atualização <= {args.max_p99_atualizacao_ms}ms")
+    gravar_alteracoes(engine, alteracoes)
+
+    # 3. Avança o relógio e grava os lembretes vencidos no outbox em lotes
+    latencias_lote, atrasos, total = [], [], 0
+    t0 = time.perf_counter()
+    fim = inicio + HORIZONTE
+    while relogio.atual < fim:
+        relogio.atual += timedelta(minutes=args.passo_minutos)
+        antes = time.perf_counter()
+        while True:
+            inicio_lote = time.perf_counter()
+            gravados = agendador.processar_vencidos()
+            if gravados:
+                latencias_lote.append(time.perf_counter() - inicio_lote)
+                total += gravados
+            if gravados < LOTE_OUTBOX:
+                break
+        # Tempo entre o avanço do relógio e o último lembrete vencido chegar ao outbox
+        atrasos.append(time.perf_counter() - antes)
+    duracao = time.perf_counter() - t0
+    estatisticas = percentis(latencias_lote)
+    print(f"[outbox] {total} lembretes gravados em {duracao:.2f}s ({total / duracao:,.0f} lembretes/s)")
+    print(f"         lote de até {LOTE_OUTBOX}: {formatar_ms(estatisticas)}")
+    print(f"         atraso por passo de {args.passo_minutos} min simulados: {formatar_ms(percentis(atrasos))}")
+    with fabrica() as db:
+        no_outbox = db.scalar(select(func.count()).select_from(LembreteOutbox))
+    verificar(no_outbox == total, f"linhas no outbox ({no_outbox}) = lembretes gravados ({total})")
+    verificar(total / duracao >= args.min_outbox, f"outbox >= {args.min_outbox:,.0f} lembretes/s")
+    verificar(estatisticas["p99"] * 1000 <= args.max_p99_lote_ms, f"p99 do lote <= {args.max_p99_lote_ms:,.0f}ms")
+
+    # 4. Trabalhador local drenando o outbox; o relógio volta ao início para que
+    #    nenhuma consulta tenha passado (senão os lembretes seriam descartados)
+    trabalhador = TrabalhadorOutbox(
+        enviar=lambda lembrete: None, fabrica_sessao=fabrica, lote=1000, agora=lambda: inicio
+    )
+    t0 = time.perf_counter()
+    enviados = 0
+    while True:
+        drenados = trabalhador.drenar()
+        enviados += drenados
+        if drenados < trabalhador.lote:
+            break
+    duracao = time.perf_counter() - t0
+    with fabrica() as db:
+        pendentes = db.scalar(select(func.count()).where(LembreteOutbox.enviado_em.is_(None)))
+    print(f"[trabalhador] {enviados} lembretes enviados em {duracao:.2f}s "
+          f"({enviados / max(duracao, 1e-9):,.0f}/s), pendentes: {pendentes}")
+    verificar(enviados == total and pendentes == 0, f"todos os {total} lembretes enviados")
+    verificar(enviados / max(duracao, 1e-9) >= args.min_trabalhador,
+              f"trabalhador >= {args.min_trabalhador:,.0f} lembretes/s")
+
+    engine.dispose()
+    return verificar.falhas
+
+if __name__ == "__main__":
+    main()
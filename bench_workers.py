@@ -0,0 +1,136 @@
+"""Benchmark de escalabilidade do modo prefork (app/servidor.py).
+
+Sobe o servidor com 1, 2, 4... até N workers em um diretório temporário,
+gera carga com vários processos clientes (conexões keep-alive) em uma rota
+autenticada e mostra requisições por segundo e latência para cada caso.
+
+    python bench_workers.py --max-workers 8 --clientes 32 --duracao 10
+"""
+import argparse
+import http.client
+import json
+import multiprocessing
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+RAIZ = os.path.dirname(os.path.abspath(__file__))
+CAMINHO = "/consultas/agenda?medico=Dr%20Bench&de=2026-01-05&ate=2026-01-11&granularidade=semana"
+
+def requisitar(conexao, metodo, caminho, corpo=None, token=None):
+    cabecalhos = {"Content-Type": "application/json"}
+    if token:
+        cabecalhos["Authorization"] = f"Bearer {token}"
+    conexao.request(metodo, caminho, body=json.dumps(corpo) if corpo else None, headers=cabecalhos)
+    resposta = conexao.getresponse()
+    dados = resposta.read()
+    return resposta.status, dados
+
+def aguardar_servidor(porta, limite=30):
+    fim = time.monotonic() + limite
+    while time.monotonic() < fim:
+        try:
+            conexao = http.client.HTTPConnection("127.0.0.1", porta, timeout=1)
+            if requisitar(conexao, "GET", "/health")[0] == 200:
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError("servidor não respondeu")
+
+def preparar_dados(porta):
+    """Cria admin, paciente e uma semana de consultas; retorna o token"""
+    conexao = http.client.HTTPConnection("127.0.0.1", porta)
+    requisitar(conexao, "POST", "/auth/register",
+               {"nome": "Admin", "email": "admin@bench.com", "senha": "bench", "tipo": "admin"})
+    requisitar(conexao, "POST", "/auth/register", {
+        "nome": "Paciente", "email": "paciente@bench.com", "senha": "bench", "tipo": "paciente",
+        "cpf": "00000000000", "telefone": "0", "data_nascimento": "1980-01-01"
+    })
+    _, dados = requisitar(conexao, "POST", "/auth/login", {"email": "admin@bench.com", "senha": "bench"})
+    token = json.loads(dados)["token"]
+    requisitar(conexao, "POST", "/consultas/lote", {"consultas": [{
+        "paciente_id": 1, "medico_nome": "Dr Bench", "data_hora": "2026-01-05T08:00:00",
+        "recorrencia": {"frequencia": "diaria", "repeticoes": 7}
+    }]}, token)
+    return token
+
+def cliente(porta, token, duracao, fila):
+    conexao = http.client.HTTPConnection("127.0.0.1", porta)
+    latencias, erros = [], 0
+    fim = time.monotonic() + duracao
+    while time.monotonic() < fim:
+        inicio = time.perf_counter()
+        try:
+            status, _ = requisitar(conexao, "GET", CAMINHO, token=token)
+            if status != 200:
+                erros += 1
+        except (OSError, http.client.HTTPException):
+            erros += 1
+            conexao = http.client.HTTPConnection("127.0.0.1", porta)
+            continue
+        latencias.append(time.perf_counter() - inicio)
+    fila.put((latencias, erros))
+
+def medir(workers, args):
+    diretorio = tempfile.mkdtemp(prefix=f"bench-workers-{workers}-")
+    ambiente = dict(os.environ, PYTHONPATH=RAIZ)
+    servidor = subprocess.Popen(
+        [sys.executable, "-m", "app.servidor", "--workers", str(workers), "--port", str(args.porta),
+         "--log-level", "warning", "--no-access-log"],
+        cwd=diretorio, env=ambiente
+    )
+    try:
+        aguardar_servidor(args.porta)
+        token = preparar_dados(args.porta)
+
+        fila = multiprocessing.Queue()
+        processos = [
+            multiprocessing.Process(target=cliente, args=(args.porta, token, args.duracao, fila))
+            for _ in range(args.clientes)
+        ]
+        for processo in processos:
+            processo.start()
+        resultados = [fila.get() for _ in processos]
+        for processo in processos:
+            processo.join()
+    finally:
+        servidor.terminate()
+        servidor.wait()
+
+    latencias = sorted(latencia for parcial, _ in resultados for latencia in parcial)
+    erros = sum(erros for _, erros in resultados)
+    return {
+        "rps": len(latencias) / args.duracao,
+        "p50": statistics.median(latencias) * 1000,
+        "p99": latencias[int(len(latencias) * 0.99)] * 1000,
+        "erros": erros,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count())
+    parser.add_argument("--clientes", type=int, default=32, help="processos clientes simultâneos")
+    parser.add_argument("--duracao", type=float, default=10, help="segundos de carga por caso")
+    parser.add_argument("--porta", type=int, default=8099)
+    args = parser.parse_args()
+
+    contagens = [1]
+    while contagens[-1] * 2 <= args.max_workers:
+        contagens.append(contagens[-1] * 2)
+    if contagens[-1] != args.max_workers:
+        contagens.append(args.max_workers)
+
+    print(f"CPUs: {os.cpu_count()} | clientes: {args.clientes} | {args.duracao:.0f}s por caso | GET {CAMINHO}")
+    print(f"{'workers':>8}{'req/s':>12}{'escala':>9}{'p50 ms':>10}{'p99 ms':>10}{'erros':>8}")
+    base = None
+    for workers in contagens:
+        resultado = medir(workers, args)
+        base = base or resultado["rps"]
+        print(f"{workers:>8}{resultado['rps']:>12,.0f}{resultado['rps'] / base:>8.2f}x"
+              f"{resultado['p50']:>10.2f}{resultado['p99']:>10.2f}{resultado['erros']:>8}")
+
+if __name__ == "__main__":
+    main()
@@ -1,24 +1,274 @@
-print(">>> ARQUIVO ver_db.py EXECUTADO <<<")
+"""Ferramenta de administração do banco SQLite da HealthAPI.
 
+Funciona com a API em execução: o backup usa a API de backup online do
+SQLite copiando poucas páginas por vez. A API abre o banco em modo WAL, em que
+as leituras (resumo, integridade) não bloqueiam as escritas; em outro modo de
+journal o integrity_check bloqueia as escritas da API enquanto roda. O ANALYZE
+da manutenção é limitado por analysis_limit para segurar pouco o lock de escrita.
+
+Exemplos:
+    python ver_db.py                      # resumo (tamanhos, linhas, índices)
+    python ver_db.py backup backups/healthapi-copia.db
+    python ver_db.py integridade --rapido
+    python ver_db.py manutencao --intervalo 3600
+"""
+import argparse
+import os
 import sqlite3
+import sys
+import time
+from datetime import datetime
+
+BANCO_PADRAO = "healthapi.db"
+
+# Páginas copiadas por passo do backup e pausa após cada passo (libera o banco para escritas)
+BACKUP_PAGINAS_POR_PASSO = 256
+BACKUP_PAUSA = 0.05
+
+# Tempo de espera por locks da API (segundos)
+TIMEOUT_LOCK = 30
+
+# Linhas examinadas por índice no ANALYZE (estatística aproximada, lock de escrita curto)
+ANALYZE_LIMITE = 1000
+
+# Consultas mais frequentes da API, usadas para mostrar quais índices são usados
+CONSULTAS_CONHECIDAS = [
+    ("login / autenticação", "SELECT * FROM usuarios WHERE email = 'x'"),
+    ("paciente por usuário", "SELECT * FROM pacientes WHERE usuario_id = 1"),
+    ("pacientes por faixa etária",
+     "SELECT id FROM pacientes WHERE data_nascimento <= '2000-01-01' AND data_nascimento > '1990-01-01'"),
+    ("agenda do médico",
+     "SELECT * FROM consultas WHERE medico_nome = 'x' AND data_hora >= '2026-01-01' "
+     "AND data_hora < '2026-01-02' ORDER BY data_hora"),
+    ("consultas do paciente", "SELECT * FROM consultas WHERE paciente_id = 1"),
+    ("feed de mudanças", "SELECT * FROM consultas WHERE seq > 0 ORDER BY seq LIMIT 500"),
+]
+
+def conectar(caminho, somente_leitura=False):
+    """Abre o banco sem criá-lo caso não exista"""
+    if not os.path.exists(caminho):
+        raise SystemExit(f"ERRO: banco não encontrado: {caminho}")
+    modo = "ro" if somente_leitura else "rw"
+    return sqlite3.connect(f"file:{caminho}?mode={modo}", uri=True, timeout=TIMEOUT_LOCK)
+
+def avisar_se_nao_wal(conn):
+    """Fora do modo WAL, leituras longas bloqueiam as escritas da API"""
+    journal = conn.execute("PRAGMA journal_mode").fetchone()[0]
+    if journal.lower() != "wal":
+        print(f"AVISO: journal_mode={journal}; enquanto este comando roda, escritas da API podem falhar "
+              "com 'database is locked' (inicie a API uma vez para ativar o WAL)", file=sys.stderr)
+
+def formatar_bytes(tamanho):
+    for unidade in ["B", "KB", "MB"]:
+        if tamanho < 1024:
+            return f"{tamanho} B" if unidade == "B" else f"{tamanho:.1f} {unidade}"
+        tamanho /= 1024
+    return f"{tamanho:.1f} GB"
+
+def listar_tabelas(conn):
+    return [nome for (nome,) in conn.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%' ORDER BY name"
+    )]
+
+def tamanhos_por_objeto(conn):
+    """Bytes ocupados por tabela/índice (requer a tabela virtual dbstat)"""
+    try:
+        return dict(conn.execute("SELECT name, SUM(pgsize) FROM dbstat GROUP BY name"))
+    except sqlite3.OperationalError:
+        return None
+
+def cmd_resumo(args):
+    """Mostra tamanho do banco, linhas e tamanho por tabela e uso dos índices"""
+    conn = conectar(args.banco, somente_leitura=True)
+    try:
+        avisar_se_nao_wal(conn)
+        pagina = conn.execute("PRAGMA page_size").fetchone()[0]
+        paginas = conn.execute("PRAGMA page_count").fetchone()[0]
+        livres = conn.execute("PRAGMA freelist_count").fetchone()[0]
+        journal = conn.execute("PRAGMA journal_mode").fetchone()[0]
+        auto_vacuum = {0: "none", 1: "full", 2: "incremental"}[conn.execute("PRAGMA auto_vacuum").fetchone()[0]]
+
+        print(f"\n=== BANCO: {args.banco} ===")
+        print(f"Tamanho: {formatar_bytes(pagina * paginas)} ({paginas} páginas de {pagina} B)")
+        print(f"Páginas livres: {livres} ({formatar_bytes(pagina * livres)})")
+        print(f"journal_mode: {journal} | auto_vacuum: {auto_vacuum}")
+
+        tamanhos = tamanhos_por_objeto(conn)
+        print("\n=== TABELAS ===")
+        print(f"{'tabela':<24}{'linhas':>10}{'tamanho':>14}")
+        for tabela in listar_tabelas(conn):
+            linhas = conn.execute(f'SELECT COUNT(*) FROM "{tabela}"').fetchone()[0]
+            tamanho = formatar_bytes(tamanhos.get(tabela, 0)) if tamanhos is not None else "-"
+            print(f"{tabela:<24}{linhas:>10}{tamanho:>14}")
+
+        # sqlite_stat1 só existe depois do primeiro ANALYZE
+        estatisticas = {}
+        if conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'sqlite_stat1'").fetchone():
+            estatisticas = {indice: stat for indice, stat in conn.execute(
+                "SELECT idx, stat FROM sqlite_stat1 WHERE idx IS NOT NULL"
+            )}
+
+        print("\n=== ÍNDICES ===")
+        print(f"{'índice':<36}{'tabela':<22}{'tamanho':>12}  estatística (linhas, linhas/chave)")
+        for indice, tabela in conn.execute(
+            "SELECT name, tbl_name FROM sqlite_master WHERE type = 'index' ORDER BY tbl_name, name"
+        ):
+            tamanho = formatar_bytes(tamanhos.get(indice, 0)) if tamanhos is not None else "-"
+            print(f"{indice:<36}{tabela:<22}{tamanho:>12}  {estatisticas.get(indice, 'sem ANALYZE')}")
+
+        print("\n=== USO DE ÍNDICES NAS CONSULTAS DA API ===")
+        for descricao, sql in CONSULTAS_CONHECIDAS:
+            try:
+                plano = [linha[-1] for linha in conn.execute(f"EXPLAIN QUERY PLAN {sql}")]
+            except sqlite3.OperationalError as erro:
+                plano = [f"indisponível ({erro})"]
+            print(f"- {descricao}: {'; '.join(plano)}")
+    finally:
+        conn.close()
+
+def cmd_backup(args):
+    """Backup online em passos, sem bloquear a API"""
+    destino = args.destino or os.path.join(
+        "backups", f"healthapi-{datetime.now().strftime('%Y%m%d-%H%M%S')}.db"
+    )
+    if os.path.exists(destino):
+        raise SystemExit(f"ERRO: destino já existe: {destino}")
+    if os.path.dirname(destino):
+        os.makedirs(os.path.dirname(destino), exist_ok=True)
+
+    def progresso(status, restantes, total):
+        copiadas = total - restantes
+        print(f"\rCopiando páginas: {copiadas}/{total}", end="", flush=True)
+        # O sleep= do sqlite3 só vale quando o banco está ocupado; a pausa entre passos fica aqui
+        if restantes and args.pausa > 0:
+            time.sleep(args.pausa)
+
+    origem = conectar(args.banco, somente_leitura=True)
+    copia = sqlite3.connect(destino)
+    inicio = time.monotonic()
+    try:
+        origem.backup(copia, pages=args.paginas, progress=progresso)
+        print()
+        resultado = copia.execute("PRAGMA quick_check").fetchone()[0]
+    except Exception:
+        copia.close()
+        os.remove(destino)
+        raise
+    finally:
+        origem.close()
+    copia.close()
+
+    print(f"Backup salvo em {destino} ({formatar_bytes(os.path.getsize(destino))}) "
+          f"em {time.monotonic() - inicio:.1f}s")
+    print(f"Verificação da cópia: {resultado}")
+    if resultado != "ok":
+        sys.exit(1)
+
+def cmd_integridade(args):
+    """PRAGMA integrity_check (completo) ou quick_check (--rapido)"""
+    pragma = "quick_check" if args.rapido else "integrity_check"
+    conn = conectar(args.banco, somente_leitura=True)
+    try:
+        avisar_se_nao_wal(conn)
+        inicio = time.monotonic()
+        problemas = [linha for (linha,) in conn.execute(f"PRAGMA {pragma}({args.max_erros})")]
+        fks = conn.execute("PRAGMA foreign_key_check").fetchall()
+    finally:
+        conn.close()
+
+    print(f"{pragma}: {'; '.join(problemas)} ({time.monotonic() - inicio:.1f}s)")
+    if fks:
+        print(f"Chaves estrangeiras inválidas: {len(fks)}")
+        for tabela, linha, referencia, _ in fks[:args.max_erros]:
+            print(f"  {tabela} rowid={linha} -> {referencia}")
+    if problemas != ["ok"] or fks:
+        sys.exit(1)
+
+def executar_manutencao(caminho, paginas_vacuum):
+    """ANALYZE, otimização do planejador e VACUUM incremental"""
+    conn = conectar(caminho)
+    try:
+        avisar_se_nao_wal(conn)
+        inicio = time.monotonic()
+        conn.execute(f"PRAGMA analysis_limit = {ANALYZE_LIMITE}")
+        conn.execute("ANALYZE")
+        conn.execute("PRAGMA optimize")
+        conn.commit()
+        mensagem = f"ANALYZE concluído em {time.monotonic() - inicio:.1f}s"
+
+        if conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2:
+            livres = conn.execute("PRAGMA freelist_count").fetchone()[0]
+            # Cada passo libera no máximo `paginas_vacuum` páginas para não segurar o lock de escrita
+            conn.execute(f"PRAGMA incremental_vacuum({paginas_vacuum})").fetchall()
+            conn.commit()
+            restantes = conn.execute("PRAGMA freelist_count").fetchone()[0]
+            mensagem += f" | VACUUM incremental: {livres - restantes} páginas liberadas, {restantes} restantes"
+        else:
+            mensagem += " | VACUUM incremental desativado (use --ativar-incremental uma vez)"
+    finally:
+        conn.close()
+    print(f"[{datetime.now():%Y-%m-%d %H:%M:%S}] {mensagem}")
+
+def cmd_manutencao(args):
+    """Executa a manutenção uma vez ou periodicamente (--intervalo)"""
+    if args.ativar_incremental:
+        # Exige um VACUUM completo, que bloqueia escritas durante a execução
+        conn = conectar(args.banco)
+        try:
+            conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+            conn.execute("VACUUM")
+        finally:
+            conn.close()
+        print("auto_vacuum = incremental ativado")
+
+    while True:
+        try:
+            executar_manutencao(args.banco, args.paginas_vacuum)
+        except sqlite3.OperationalError as erro:
+            # Banco ocupado: tenta de novo no próximo ciclo
+            print(f"[{datetime.now():%Y-%m-%d %H:%M:%S}] ERRO: {erro}")
+            if not args.intervalo:
+                sys.exit(1)
+        if not args.intervalo:
+            break
+        time.sleep(args.intervalo)
+
+def criar_parser():
+    parser = argparse.ArgumentParser(description="Administração do banco da HealthAPI")
+    parser.add_argument("--banco", default=BANCO_PADRAO, help="caminho do arquivo SQLite")
+    subcomandos = parser.add_subparsers(dest="comando")
+
+    resumo = subcomandos.add_parser("resumo", help="tamanhos, linhas e uso de índices")
+    resumo.set_defaults(funcao=cmd_resumo)
 
-conn = sqlite3.connect("healthapi.db")
-cur = conn.cursor()
+    backup = subcomandos.add_parser("backup", help="backup online")
+    backup.add_argument("destino", nargs="?", help="arquivo de destino (padrão: backups/healthapi-<data>.db)")
+    backup.add_argument("--paginas", type=int, default=BACKUP_PAGINAS_POR_PASSO, help="páginas por passo")
+    backup.add_argument("--pausa", type=float, default=BACKUP_PAUSA, help="pausa após cada passo, em segundos (0 desativa)")
+    backup.set_defaults(funcao=cmd_backup)
 
-try:
-    print("\n=== TABELAS ===")
-    cur.execute("SELECT name FROM sqlite_master WHERE type='table';")
-    print(cur.fetchall())
+    integridade = subcomandos.add_parser("integridade", help="verificação de integridade")
+    integridade.add_argument("--rapido", action="store_true", help="usa quick_check")
+    integridade.add_argument("--max-erros", type=int, default=100)
+    integridade.set_defaults(funcao=cmd_integridade)
 
-    print("\n=== USUÁRIOS ===")
-    cur.execute("SELECT * FROM usuarios;")
-    usuarios = cur.fetchall()
-    print("TOTAL:", len(usuarios))
-    for u in usuarios:
-        print(u)
+    manutencao = subcomandos.add_parser("manutencao", help="ANALYZE e VACUUM incremental")
+    manutencao.add_argument("--intervalo", type=int, default=0, help="repete a cada N segundos")
+    manutencao.add_argument("--paginas-vacuum", type=int, default=1000, help="páginas liberadas por execução")
+    manutencao.add_argument("--ativar-incremental", action="store_true",
+                            help="ativa auto_vacuum incremental (VACUUM completo, uma única vez)")
+    manutencao.set_defaults(funcao=cmd_manutencao)
 
-except Exception as e:
-    print("ERRO:", e)
+    return parser
 
-conn.close()
+def main(argv=None):
+    args = criar_parser().parse_args(argv)
+    if args.comando is None:
+        args.funcao = cmd_resumo
+    try:
+        args.funcao(args)
+    except KeyboardInterrupt:
+        pass
 
+if __name__ == "__main__":
+    main()